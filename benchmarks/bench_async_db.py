@@ -0,0 +1,92 @@
+"""Throughput of the threadpool (sync) users routes vs the async routes.
+
+Usage:
+    python benchmarks/bench_async_db.py [--requests 2000] [--concurrency 200]
+
+Runs against a throwaway SQLite file unless BENCH_DATABASE_URL points at a
+real database (e.g. the MySQL instance from docker-compose). SQLite serializes
+writers and has no network latency, so absolute numbers understate the gap you
+get against MySQL; use it to compare the two paths, not as a capacity figure.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+_tmpdir = tempfile.mkdtemp(prefix="bench-async-db-")
+os.environ["DATABASE_URL"] = os.getenv("BENCH_DATABASE_URL", f"sqlite:///{_tmpdir}/bench.db")
+os.environ["USE_ASYNC_DB"] = "true"
+os.environ.setdefault("LOG_FILE", os.path.join(_tmpdir, "app.log"))
+# Every GET would otherwise be served by the in-process user cache, not the database.
+os.environ["USER_CACHE_ENABLED"] = "false"
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+
+from src.database.core import engine  # noqa: E402
+from src.users.router import router as sync_router  # noqa: E402
+from src.users.async_router import router as async_router  # noqa: E402
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username VARCHAR(100) NOT NULL,
+    email VARCHAR(255) NOT NULL UNIQUE,
+    is_active TINYINT(1) DEFAULT 1,
+    version INT NOT NULL DEFAULT 1
+)
+"""
+
+
+def seed(rows: int) -> None:
+    with engine.begin() as conn:
+        if engine.dialect.name == "sqlite":
+            conn.execute(text(SQLITE_SCHEMA))
+        conn.execute(text("DELETE FROM users"))
+        conn.execute(
+            text("INSERT INTO users (username, email, is_active) VALUES (:u, :e, 1)"),
+            [{"u": f"user{i}", "e": f"user{i}@example.com"} for i in range(rows)],
+        )
+
+
+def build_app(router) -> FastAPI:
+    app = FastAPI()
+    app.include_router(router)
+    return app
+
+
+async def run(app: FastAPI, total: int, concurrency: int, seeded: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    semaphore = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one(i: int):
+            async with semaphore:
+                response = await client.get(f"/users/{(i % seeded) + 1}")
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--rows", type=int, default=1000)
+    args = parser.parse_args()
+
+    seed(args.rows)
+    print(f"database={engine.url.get_backend_name()} requests={args.requests} concurrency={args.concurrency}")
+    for label, router in (("threadpool", sync_router), ("async", async_router)):
+        elapsed = asyncio.run(run(build_app(router), args.requests, args.concurrency, args.rows))
+        print(f"{label:>10}: {args.requests / elapsed:8.1f} req/s ({elapsed:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
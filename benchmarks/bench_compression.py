@@ -0,0 +1,74 @@
+"""CPU cost against bytes saved for each response encoding and level.
+
+Usage:
+    python benchmarks/bench_compression.py [--rounds 50] [--export-rows 10000]
+
+Payloads mirror what the users API sends: one GET /users?size=100 page as the
+router encodes it, and an NDJSON export fed in 1000-row chunks with a flush
+after each, as CompressionMiddleware does for streamed bodies. Encoders are the
+middleware's own; br and zstd are only measured when their packages are installed.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.middlewares.compression import ENCODERS  # noqa: E402
+from src.utils import json_codec  # noqa: E402
+from src.utils.response_builder import make_response  # noqa: E402
+
+LEVELS = {"gzip": (1, 6, 9), "br": (1, 4, 6), "zstd": (1, 3, 9)}
+CHUNK_ROWS = 1000
+
+
+def user(i: int) -> dict:
+    return {"username": f"user{i}", "email": f"user{i}@example.com", "is_active": i % 7 != 0, "id": i, "version": 1 + i % 3}
+
+
+def list_page() -> list:
+    page = {"total": 100000, "page": 1, "size": 100, "data": [user(i) for i in range(1, 101)], "has_more": True, "next_cursor": None}
+    return [json_codec.dumps(make_response(page, 200, "Users fetched successfully."))]
+
+
+def export_chunks(rows: int) -> list:
+    return [
+        b"".join(json_codec.dumps(user(i)) + b"\n" for i in range(start, min(start + CHUNK_ROWS, rows)))
+        for start in range(0, rows, CHUNK_ROWS)
+    ]
+
+
+def compress(coding: str, level: int, chunks: list) -> int:
+    encoder = ENCODERS[coding](level)
+    size = 0
+    for chunk in chunks[:-1]:
+        size += len(encoder.compress(chunk) + encoder.flush())
+    return size + len(encoder.compress(chunks[-1]) + encoder.finish())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--export-rows", type=int, default=10000)
+    args = parser.parse_args()
+
+    payloads = {"list page": list_page(), "ndjson export": export_chunks(args.export_rows)}
+    print(f"encoders: {', '.join(ENCODERS)}; rounds={args.rounds}")
+    for name, chunks in payloads.items():
+        original = sum(len(chunk) for chunk in chunks)
+        print(f"{name}: {original} bytes")
+        for coding in ENCODERS:
+            for level in LEVELS[coding]:
+                start = time.perf_counter()
+                for _ in range(args.rounds):
+                    size = compress(coding, level, chunks)
+                elapsed = (time.perf_counter() - start) / args.rounds
+                print(
+                    f"  {coding:>4} {level}: {size:8d} bytes ({size / original:6.1%}), "
+                    f"{elapsed * 1e3:7.3f} ms, {(original - size) / 1024 / elapsed / 1024:7.1f} MB saved per CPU-second"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Cost of verify_token with and without the verified-token cache.
+
+Usage:
+    python benchmarks/bench_jwt.py [--calls 2000]
+
+One HS256 token signed with SECRET_KEY and one RS256 token whose `kid` points
+into a temporary JWKS file. "uncached" clears the cache before every call, so
+each call decodes and checks the signature with the preloaded key objects;
+"cached" reuses the token as clients do between refreshes.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from jose import jwk, jwt  # noqa: E402
+import rsa  # noqa: E402
+
+public_key, private_key = rsa.newkeys(2048)
+private_pem = private_key.save_pkcs1().decode("ascii")
+jwks = {"keys": [{**jwk.construct(public_key.save_pkcs1().decode("ascii"), "RS256").to_dict(), "kid": "k1"}]}
+KEYS_FILE = os.path.join(tempfile.mkdtemp(), "jwks.json")
+with open(KEYS_FILE, "w") as f:
+    json.dump(jwks, f)
+os.environ["JWT_KEYS_FILE"] = KEYS_FILE
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from src.utils.jwt_handler import create_access_token, token_cache, verify_token  # noqa: E402
+
+
+def measure(token: str, calls: int, cached: bool) -> float:
+    assert verify_token(token) is not None
+    start = time.perf_counter()
+    for _ in range(calls):
+        if not cached:
+            token_cache.clear()
+        verify_token(token)
+    return (time.perf_counter() - start) / calls
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=2000)
+    args = parser.parse_args()
+
+    tokens = {
+        "HS256": create_access_token({"sub": "bench"}),
+        "RS256": jwt.encode(
+            {"sub": "bench", "exp": int(time.time()) + 3600}, private_pem, algorithm="RS256", headers={"kid": "k1"}
+        ),
+    }
+    print(f"calls={args.calls}")
+    for label, token in tokens.items():
+        uncached = measure(token, args.calls, cached=False)
+        cached = measure(token, args.calls, cached=True)
+        print(f"{label}: uncached {uncached * 1e6:8.1f} us/call, cached {cached * 1e6:6.1f} us/call")
+
+
+if __name__ == "__main__":
+    main()
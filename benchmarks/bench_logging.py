@@ -0,0 +1,122 @@
+"""Request latency with synchronous log handlers versus the queue-backed pipeline.
+
+Usage:
+    python benchmarks/bench_logging.py [--requests 3000] [--lines 4] [--sink-latency-us 200]
+
+Each request to the test app logs `--lines` INFO records, roughly what a users
+endpoint emits between router and service. Handlers write to a temporary file
+and to a stream standing in for stdout. "sync" wires them straight onto the root
+logger as before; "queue" is src.logger's QueueHandler + listener thread; with
+sampling at 10% only a tenth of INFO records are formatted and enqueued.
+
+Every scenario runs twice: against the page cache, where writes are nearly
+free and the listener thread only adds GIL hand-offs, and with a stdout that
+blocks for --sink-latency-us per write, as a full container log pipe or a slow
+disk does. The second case is the one the queue exists for.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+
+from src.logger import JsonFormatter, SamplingFilter, log_listener, logger  # noqa: E402
+
+
+def build_app(lines: int) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/users/{user_id}")
+    async def get_user(user_id: int):
+        for i in range(lines):
+            logger.info("Fetching user with ID: %s (step %s)", user_id, i)
+        return {"id": user_id}
+
+    return app
+
+
+class SlowStream:
+    def __init__(self, stream, latency: float):
+        self.stream = stream
+        self.latency = latency
+
+    def write(self, data: str) -> int:
+        if self.latency:
+            time.sleep(self.latency)
+        return self.stream.write(data)
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+
+def sync_handlers(directory: str, latency: float) -> list:
+    handlers = [
+        logging.FileHandler(os.path.join(directory, "sync.log")),
+        logging.StreamHandler(SlowStream(open(os.path.join(directory, "stdout.log"), "w"), latency)),
+    ]
+    for handler in handlers:
+        handler.setFormatter(JsonFormatter())
+    return handlers
+
+
+async def drive(app: FastAPI, requests: int) -> list:
+    timings = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for i in range(requests):
+            start = time.perf_counter()
+            await client.get(f"/users/{i}")
+            timings.append(time.perf_counter() - start)
+    return timings
+
+
+def report(label: str, timings: list) -> None:
+    timings = sorted(timings)
+    p99 = timings[int(len(timings) * 0.99)]
+    print(f"{label:>14}: mean {statistics.mean(timings) * 1e6:7.1f} us, p99 {p99 * 1e6:7.1f} us")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--lines", type=int, default=4)
+    parser.add_argument("--sink-latency-us", type=float, default=200)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    queue_handler = root.handlers[0]
+    sampling = SamplingFilter(0.1)
+    app = build_app(args.lines)
+
+    print(f"requests={args.requests} info lines/request={args.lines}")
+    for latency in (0.0, args.sink_latency_us / 1e6):
+        print(f"stdout write latency {latency * 1e6:.0f} us")
+        log_listener.handlers = tuple(sync_handlers(directory, latency))
+
+        root.handlers[:] = sync_handlers(directory, latency)
+        report("sync", asyncio.run(drive(app, args.requests)))
+
+        root.handlers[:] = [queue_handler]
+        report("queue", asyncio.run(drive(app, args.requests)))
+
+        queue_handler.addFilter(sampling)
+        report("queue + 10%", asyncio.run(drive(app, args.requests)))
+        queue_handler.removeFilter(sampling)
+
+        # Let the listener drain before the next round's timings start.
+        while not queue_handler.queue.empty():
+            time.sleep(0.01)
+
+
+if __name__ == "__main__":
+    main()
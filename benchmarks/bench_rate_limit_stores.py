@@ -0,0 +1,68 @@
+"""Per-request overhead of each rate limit storage backend.
+
+Usage:
+    python benchmarks/bench_rate_limit_stores.py [--hits 5000] [--concurrency 100]
+
+The redis backend runs against RATE_LIMIT_REDIS_URL when it is set, otherwise
+against an in-process fakeredis server (pip install "fakeredis[lua]"). fakeredis
+executes Lua in Python, so it is far slower than a real server; treat its
+numbers as an upper bound on client-side overhead only.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.middlewares.rate_limit_store import InMemoryStore, RedisStore, SharedMemoryStore  # noqa: E402
+
+
+def redis_store():
+    url = os.getenv("RATE_LIMIT_REDIS_URL")
+    if url:
+        return RedisStore(url)
+    try:
+        import fakeredis
+    except ImportError:
+        return None
+    return RedisStore(client=fakeredis.aioredis.FakeRedis())
+
+
+async def run(store, hits: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            await store.hit(f"10.0.{i >> 8 & 255}.{i & 255}|", 100, 60, time.time())
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(hits)))
+    return time.perf_counter() - start
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--hits", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    args = parser.parse_args()
+
+    stores = {
+        "memory": InMemoryStore(),
+        "shared": SharedMemoryStore(os.path.join(tempfile.mkdtemp(), "rate-limit"), slots=65_536),
+        "redis": redis_store(),
+    }
+    print(f"hits={args.hits} concurrency={args.concurrency}")
+    for label, store in stores.items():
+        if store is None:
+            print(f"{label:>8}: skipped (no redis server or fakeredis)")
+            continue
+        elapsed = await run(store, args.hits, args.concurrency)
+        print(f"{label:>8}: {elapsed / args.hits * 1e6:8.1f} us/request")
+        await store.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
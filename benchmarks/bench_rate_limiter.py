@@ -0,0 +1,78 @@
+"""Per-request cost and memory of the rate limiter with many distinct clients.
+
+Usage:
+    python benchmarks/bench_rate_limiter.py [--keys 1000000] [--max-keys 100000]
+
+Compares the in-memory sliding-window store with the previous deque-of-timestamps
+algorithm. Memory is measured with tracemalloc, which slows both sides down
+equally; the timing pass runs without it.
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from collections import defaultdict, deque
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.middlewares.rate_limit_store import InMemoryStore  # noqa: E402
+
+
+class DequeLimiter:
+    def __init__(self, max_requests: int, period: int):
+        self.max_requests = max_requests
+        self.period = period
+        self.access_log = defaultdict(deque)
+
+    def allow(self, ip: str, limit: int, period: float, now: float) -> bool:
+        access_times = self.access_log[ip]
+        while access_times and now - access_times[0] > self.period:
+            access_times.popleft()
+        if len(access_times) >= self.max_requests:
+            return False
+        access_times.append(now)
+        return True
+
+
+def drive(limiter, keys: list, hits_per_key: int) -> float:
+    now = time.time()
+    start = time.perf_counter()
+    for _ in range(hits_per_key):
+        for key in keys:
+            limiter.allow(key, 10, 60, now)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--keys", type=int, default=1_000_000)
+    parser.add_argument("--hits-per-key", type=int, default=3)
+    parser.add_argument("--max-keys", type=int, default=100_000)
+    args = parser.parse_args()
+
+    keys = [f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(args.keys)]
+    total = args.keys * args.hits_per_key
+    factories = {
+        "deque (old)": lambda: DequeLimiter(max_requests=10, period=60),
+        "sliding window": lambda: InMemoryStore(max_keys=args.max_keys),
+    }
+
+    print(f"keys={args.keys} hits/key={args.hits_per_key} max_keys={args.max_keys}")
+    for label, factory in factories.items():
+        elapsed = drive(factory(), keys, args.hits_per_key)
+
+        tracemalloc.start()
+        limiter = factory()
+        drive(limiter, keys, args.hits_per_key)
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        print(
+            f"{label:>15}: {elapsed / total * 1e9:7.0f} ns/request, "
+            f"{current / 1024 / 1024:8.1f} MiB retained"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Scan cost of the malicious payload filter across payload sizes and nesting depths.
+
+Usage:
+    python benchmarks/bench_sanitizer.py [--repeat 200]
+
+Compares the previous per-pattern recursive scan with PayloadScanner on decoded
+JSON, and with its raw-bytes scan that skips json.loads. Nesting stays within
+the default max_depth so every leaf string is scanned.
+
+All payloads are clean, which is the common case and the worst case for the
+scanner since every string has to be searched to the end.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.middlewares.sanitization import PayloadScanner, malicious_patterns  # noqa: E402
+
+
+def old_contains_malicious(value, depth=0, max_depth=5):
+    if depth > max_depth:
+        return False
+    if isinstance(value, str):
+        return any(p.search(value) for p in malicious_patterns)
+    if isinstance(value, dict):
+        return any(old_contains_malicious(v, depth + 1) for v in value.values())
+    if isinstance(value, list):
+        return any(old_contains_malicious(v, depth + 1) for v in value)
+    return False
+
+
+def build_payload(leaves: int, depth: int, text_len: int):
+    text = ("lorem ipsum dolor sit amet " * (text_len // 27 + 1))[:text_len]
+    leaf = {f"field_{i}": text for i in range(leaves)}
+    for level in range(depth):
+        leaf = {"level": f"level {level}", "child": leaf}
+    return leaf
+
+
+def timed(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    scanner = PayloadScanner()
+    cases = [
+        (10, 0, 32),
+        (10, 0, 4096),
+        (100, 0, 256),
+        (10, 2, 256),
+        (10, 4, 256),
+    ]
+    print(f"{'leaves':>6} {'depth':>5} {'str len':>7} {'bytes':>8} {'old us':>9} {'scanner us':>11} {'raw us':>9}")
+    for leaves, depth, text_len in cases:
+        payload = build_payload(leaves, depth, text_len)
+        body = json.dumps(payload).encode()
+        old = timed(lambda: old_contains_malicious(json.loads(body)), args.repeat)
+        scanned = timed(lambda: scanner.contains_malicious(json.loads(body)), args.repeat)
+        raw = timed(lambda: scanner.raw_verdict(body), args.repeat)
+        print(f"{leaves:>6} {depth:>5} {text_len:>7} {len(body):>8} {old:>9.1f} {scanned:>11.1f} {raw:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Requests/sec for GET /users?size=100 with the old and the fast serialization path.
+
+Usage:
+    python benchmarks/bench_serialization.py [--requests 500] [--rows 1000]
+
+Both endpoints run the same queries against a temporary SQLite database. "old"
+reproduces the previous path: every row validated into UserOut, the page
+validated into PaginatedResponse, the envelope validated again by
+GenericResponse and encoded by stdlib json. "fast" is the real users router:
+the page validated in one batch call, a plain-dict envelope and FastJSONResponse.
+Middlewares are left out so only serialization differs.
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import httpx  # noqa: E402
+from fastapi import Depends, FastAPI, Query  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+from src.database.sql_registry import sql_registry  # noqa: E402
+from src.users.models import UserOut  # noqa: E402
+from src.users.router import get_db, router  # noqa: E402
+from src.utils.paginated_response import PaginatedResponse  # noqa: E402
+from src.utils.response_models import GenericResponse  # noqa: E402
+
+
+def seed(rows: int) -> None:
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute(
+        "CREATE TABLE users (id INTEGER PRIMARY KEY AUTOINCREMENT, username VARCHAR(100) NOT NULL, "
+        "email VARCHAR(255) NOT NULL UNIQUE, is_active TINYINT(1) DEFAULT 1, version INT NOT NULL DEFAULT 1)"
+    )
+    conn.executemany(
+        "INSERT INTO users (username, email) VALUES (?, ?)",
+        ((f"user{i}", f"user{i}@example.com") for i in range(rows)),
+    )
+    conn.commit()
+    conn.close()
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(router)
+
+    @app.get("/old/users")
+    def old_get_all(db=Depends(get_db), page: int = Query(1), size: int = Query(10)):
+        rows = db.execute(sql_registry.get("users/get_all_users"), {"limit": size, "offset": (page - 1) * size}).all()
+        total = db.execute(sql_registry.get("users/count_users")).scalar()
+        paginated = PaginatedResponse[UserOut](
+            total=total, page=page, size=size, data=[UserOut(**row._mapping) for row in rows],
+            has_more=(page - 1) * size + len(rows) < total,
+        )
+        content = GenericResponse(status=200, message="Users fetched successfully.", data=paginated.model_dump())
+        return JSONResponse(status_code=200, content=content.model_dump())
+
+    return app
+
+
+async def drive(app: FastAPI, path: str, requests: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        assert (await client.get(path)).status_code == 200
+        start = time.perf_counter()
+        for _ in range(requests):
+            await client.get(path)
+        return requests / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--rows", type=int, default=1000)
+    args = parser.parse_args()
+
+    seed(args.rows)
+    app = build_app()
+    print(f"requests={args.requests} rows={args.rows} page size=100")
+    for label, path in (("old", "/old/users?size=100"), ("fast", "/users/?size=100")):
+        print(f"{label:>5}: {asyncio.run(drive(app, path, args.requests)):8.1f} req/s")
+
+
+if __name__ == "__main__":
+    main()
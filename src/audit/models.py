@@ -0,0 +1,10 @@
+from datetime import datetime
+from typing import Any, Optional
+from pydantic import Json
+from src.utils.strict_json_model import StrictBaseModel
+
+class AuditEventOut(StrictBaseModel):
+    id: int
+    event_type: str
+    event_data: Optional[Json[Any]] = None
+    created_at: datetime
@@ -0,0 +1,55 @@
+from datetime import datetime
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import Annotated, Optional
+import os
+from dotenv import load_dotenv
+from src.audit.models import AuditEventOut
+from src.audit.service import list_audit_events
+from src.dependencies.jwt_auth import get_current_user
+from src.users.router import get_db
+from src.utils.response_builder import make_response
+from src.utils.fast_json_response import FastJSONResponse
+from src.utils.response_models import GenericResponse
+from src.utils.exceptions import AppException
+from src.utils.paginated_response import PaginatedResponse
+from src.logger import logger
+
+load_dotenv()
+IS_DEV = os.getenv("ENV", "dev") == "dev"
+
+router = APIRouter(prefix="/audit", tags=["audit"], dependencies=[Depends(get_current_user)])
+
+
+@router.get("/events", response_model=GenericResponse[PaginatedResponse[AuditEventOut]])
+def api_list_audit_events(
+    db: Annotated[Session, Depends(get_db)],
+    size: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page."),
+    event_type: Optional[str] = Query(None, max_length=100),
+    since: Optional[datetime] = Query(None, description="Inclusive lower bound on created_at (UTC)."),
+    until: Optional[datetime] = Query(None, description="Inclusive upper bound on created_at (UTC)."),
+):
+    logger.info("Fetching audit events (type=%s, size=%s, cursor=%r)", event_type, size, cursor)
+    try:
+        paginated = list_audit_events(db, size, cursor, event_type, since, until)
+        return FastJSONResponse(
+            status_code=200,
+            content=make_response(
+                data=paginated.model_dump(mode="json"),
+                status=200,
+                message="Audit events fetched successfully."
+            )
+        )
+    except AppException as e:
+        logger.warning("AppException during list_audit_events: %s", e.message)
+        return FastJSONResponse(
+            status_code=e.status_code,
+            content=make_response(None, e.status_code, e.message)
+        )
+    except Exception as e:
+        logger.exception("Unexpected error during list_audit_events")
+        return FastJSONResponse(
+            status_code=500,
+            content=make_response(None, 500, str(e) if IS_DEV else "Internal server error")
+        )
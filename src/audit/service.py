@@ -0,0 +1,147 @@
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from dotenv import load_dotenv
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import SQLAlchemyError
+from src.audit.models import AuditEventOut
+from src.database.replicas import reads_from_replica
+from src.database.sql_registry import sql_registry
+from src.logger import logger
+from src.utils.db_error_parser import handle_sql_error
+from src.utils.exceptions import AppException
+from src.utils.hydration import hydrate_rows
+from src.utils.metrics import metrics
+from src.utils.paginated_response import PaginatedResponse
+from src.utils.pagination import decode_cursor, encode_cursor
+
+load_dotenv()
+
+sql_registry.require(
+    "audit/list_audit_logs", "audit/list_audit_logs_by_type",
+    "audit/get_expired_audit_log_ids", "audit/delete_audit_logs_by_ids",
+)
+
+# 0 keeps audit events forever.
+AUDIT_RETENTION_DAYS = int(os.getenv("AUDIT_RETENTION_DAYS", "90"))
+AUDIT_PURGE_BATCH_SIZE = int(os.getenv("AUDIT_PURGE_BATCH_SIZE", "1000"))
+AUDIT_PURGE_PAUSE = float(os.getenv("AUDIT_PURGE_PAUSE", "0.1"))
+AUDIT_PURGE_INTERVAL = float(os.getenv("AUDIT_PURGE_INTERVAL", "3600"))
+
+# Defaults for an open time range; both fit a MySQL TIMESTAMP comparison.
+MIN_TIME = datetime(1970, 1, 2)
+MAX_TIME = datetime(9999, 12, 31, 23, 59, 59)
+MAX_ID = 2 ** 63 - 1
+
+purged_rows = metrics.counter("audit_purged_rows_total", "Audit events deleted by the retention job.")
+
+
+def _naive_utc(value: datetime) -> datetime:
+    # created_at is stored as naive UTC, so aware bounds are converted before
+    # they are compared or bound.
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _before(cursor: Optional[str], until: datetime) -> tuple:
+    # Pages run newest first, so the next page starts strictly before the last
+    # (created_at, id) returned; the first page starts at `until`, inclusive.
+    if not cursor:
+        return until, MAX_ID
+    values = decode_cursor(cursor)
+    try:
+        return datetime.fromisoformat(values["created_at"]), int(values["id"])
+    except (KeyError, TypeError, ValueError):
+        raise AppException("Invalid pagination cursor.", 400, safe_to_show=True)
+
+
+@reads_from_replica
+def list_audit_events(
+    session: Session,
+    size: int,
+    cursor: Optional[str] = None,
+    event_type: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> PaginatedResponse[AuditEventOut]:
+    logger.debug("Listing audit events (type=%s, since=%s, until=%s, cursor=%r)", event_type, since, until, cursor)
+    since = _naive_utc(since) if since else MIN_TIME
+    until = _naive_utc(until) if until else MAX_TIME
+    if since > until:
+        raise AppException("'since' must not be after 'until'.", 400, safe_to_show=True)
+    before_created_at, before_id = _before(cursor, until)
+    params = {
+        "since": since,
+        "before_created_at": before_created_at,
+        "before_id": before_id,
+        "limit": size + 1,
+    }
+    if event_type:
+        params["event_type"] = event_type
+    try:
+        stmt = sql_registry.get("audit/list_audit_logs_by_type" if event_type else "audit/list_audit_logs")
+        rows = session.execute(stmt, params).all()
+    except SQLAlchemyError as e:
+        logger.exception("Database error during list_audit_events")
+        handle_sql_error(e, entity="Audit event")
+
+    has_more = len(rows) > size
+    items = hydrate_rows(rows[:size], AuditEventOut)
+    next_cursor = None
+    if has_more:
+        last = items[-1]
+        next_cursor = encode_cursor({"created_at": last.created_at.isoformat(), "id": last.id})
+    return PaginatedResponse[AuditEventOut].model_construct(
+        size=size, data=items, has_more=has_more, next_cursor=next_cursor
+    )
+
+
+def purge_expired_audit_events(
+    engine: Engine,
+    retention_days: int = AUDIT_RETENTION_DAYS,
+    batch_size: int = AUDIT_PURGE_BATCH_SIZE,
+    pause: float = AUDIT_PURGE_PAUSE,
+) -> int:
+    # Oldest first, `batch_size` rows per short transaction: the ids come from
+    # the (created_at, id) index and the DELETE only touches those primary keys,
+    # so no statement holds locks for long. `pause` lets replicas keep up.
+    if retention_days <= 0:
+        return 0
+    cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=retention_days)
+    select_ids = sql_registry.get("audit/get_expired_audit_log_ids")
+    delete_ids = sql_registry.get("audit/delete_audit_logs_by_ids", expanding=["ids"])
+    total = 0
+    while True:
+        with engine.begin() as conn:
+            ids = conn.execute(select_ids, {"cutoff": cutoff, "limit": batch_size}).scalars().all()
+            if ids:
+                conn.execute(delete_ids, {"ids": ids})
+        total += len(ids)
+        purged_rows.inc(amount=len(ids))
+        if len(ids) < batch_size:
+            break
+        time.sleep(pause)
+    if total:
+        logger.info("Purged %s audit events older than %s", total, cutoff)
+    return total
+
+
+def start_retention_job(engine: Engine, interval: float = AUDIT_PURGE_INTERVAL) -> Optional[threading.Thread]:
+    if AUDIT_RETENTION_DAYS <= 0:
+        return None
+
+    def run() -> None:
+        while True:
+            try:
+                purge_expired_audit_events(engine)
+            except SQLAlchemyError:
+                logger.exception("Audit retention purge failed")
+            time.sleep(interval)
+
+    thread = threading.Thread(target=run, name="audit-retention", daemon=True)
+    thread.start()
+    return thread
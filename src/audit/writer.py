@@ -0,0 +1,207 @@
+import fcntl
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from typing import List, Optional
+from dotenv import load_dotenv
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+from src.database.core import engine
+from src.database.sql_registry import sql_registry
+from src.logger import logger
+from src.utils import json_codec
+from src.utils.metrics import metrics
+
+load_dotenv()
+
+sql_registry.require("audit/insert_audit_logs")
+
+OVERFLOW_POLICIES = ("block", "drop", "spill")
+
+audit_events = metrics.counter(
+    "audit_events_total", "Audit events by outcome: written, dropped, spilled or failed.", ("outcome",)
+)
+audit_flush_seconds = metrics.histogram(
+    "audit_flush_seconds", "Time to write one batch of audit events.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+
+
+class AuditWriter:
+    # Callers only serialize the event and put it on a bounded queue; a
+    # background thread writes batches with one multi-row INSERT each, whenever
+    # `batch_size` events are waiting or `flush_interval` seconds have passed.
+    # When the queue is full, `overflow` decides: "block" waits up to
+    # `block_timeout` and then drops, "drop" drops at once, "spill" appends the
+    # event to `spill_path`. Batches that fail to insert are spilled as well,
+    # and spilled events are loaded again the next time the writer starts.
+    def __init__(
+        self,
+        engine: Engine,
+        max_queue: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        overflow: str = "spill",
+        spill_path: str = "logs/audit_spill.jsonl",
+        block_timeout: float = 1.0,
+    ):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown audit overflow policy '{overflow}'")
+        self.engine = engine
+        self.queue: queue.Queue = queue.Queue(max_queue)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.spill_path = spill_path
+        self.block_timeout = block_timeout
+        self._spill_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def record(self, event_type: str, data: dict) -> None:
+        event = {
+            "event_type": event_type,
+            "event_data": json_codec.dumps(data).decode("utf-8"),
+            "created_at": datetime.now(timezone.utc).replace(tzinfo=None),
+        }
+        try:
+            if self.overflow == "block":
+                self.queue.put(event, timeout=self.block_timeout)
+            else:
+                self.queue.put_nowait(event)
+        except queue.Full:
+            if self.overflow == "spill":
+                self._spill([event])
+            else:
+                audit_events.inc(("dropped",))
+                logger.warning("Audit queue full, dropped %s event", event_type)
+
+    def _open_spill(self):
+        # Every worker appends to the same file, so appends hold an exclusive
+        # flock. A loader may have renamed the file away while we waited for the
+        # lock; appending to that inode would lose the events, so reopen then.
+        while True:
+            f = open(self.spill_path, "ab")
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                if os.stat(self.spill_path).st_ino == os.fstat(f.fileno()).st_ino:
+                    return f
+            except FileNotFoundError:
+                pass
+            f.close()
+
+    def _spill(self, events: List[dict]) -> None:
+        try:
+            with self._spill_lock, self._open_spill() as f:
+                for event in events:
+                    f.write(json_codec.dumps({**event, "created_at": event["created_at"].isoformat()}) + b"\n")
+            audit_events.inc(("spilled",), len(events))
+        except OSError:
+            audit_events.inc(("dropped",), len(events))
+            logger.exception("Could not spill %s audit events to %s", len(events), self.spill_path)
+
+    def _load_spill(self) -> List[dict]:
+        # The file is renamed to a name only this process uses before it is read,
+        # so appends from other workers go to a fresh file instead of being removed
+        # with it.
+        private = f"{self.spill_path}.{os.getpid()}.{time.time_ns()}"
+        try:
+            os.rename(self.spill_path, private)
+        except FileNotFoundError:
+            return []
+        with open(private, "rb") as f:
+            # Waits for a writer that opened the file before the rename.
+            fcntl.flock(f, fcntl.LOCK_EX)
+            lines = f.read().splitlines()
+        os.remove(private)
+        events = []
+        for line in filter(None, lines):
+            event = json_codec.loads(line)
+            event["created_at"] = datetime.fromisoformat(event["created_at"])
+            events.append(event)
+        return events
+
+    def _write(self, events: List[dict]) -> None:
+        start = time.perf_counter()
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(sql_registry.get("audit/insert_audit_logs"), events)
+            audit_events.inc(("written",), len(events))
+        except SQLAlchemyError:
+            audit_events.inc(("failed",), len(events))
+            logger.exception("Failed to write %s audit events", len(events))
+            self._spill(events)
+        finally:
+            audit_flush_seconds.observe(time.perf_counter() - start)
+
+    def _drain(self, limit: int) -> List[dict]:
+        events = []
+        while len(events) < limit:
+            try:
+                events.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return events
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            deadline = time.monotonic() + self.flush_interval
+            batch = []
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._stop.is_set():
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+                batch.extend(self._drain(self.batch_size - len(batch)))
+            if batch:
+                self._write(batch)
+        while True:
+            batch = self._drain(self.batch_size)
+            if not batch:
+                break
+            self._write(batch)
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        spilled = self._load_spill()
+        for start in range(0, len(spilled), self.batch_size):
+            self._write(spilled[start:start + self.batch_size])
+        if spilled:
+            logger.info("Replayed %s spilled audit events", len(spilled))
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def close(self, timeout: float = 10.0) -> None:
+        # Writes everything still queued before returning.
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.error("Audit writer did not drain within %ss, %s events left", timeout, self.queue.qsize())
+        self._thread = None
+
+
+def build_audit_writer(engine: Engine) -> AuditWriter:
+    return AuditWriter(
+        engine,
+        max_queue=int(os.getenv("AUDIT_QUEUE_SIZE", "10000")),
+        batch_size=int(os.getenv("AUDIT_BATCH_SIZE", "500")),
+        flush_interval=float(os.getenv("AUDIT_FLUSH_INTERVAL", "1.0")),
+        overflow=os.getenv("AUDIT_OVERFLOW_POLICY", "spill").lower(),
+        spill_path=os.getenv("AUDIT_SPILL_FILE", "logs/audit_spill.jsonl"),
+        block_timeout=float(os.getenv("AUDIT_BLOCK_TIMEOUT", "1.0")),
+    )
+
+
+audit_writer = build_audit_writer(engine)
+metrics.callback_gauge(
+    "audit_queue_depth", "Audit events waiting to be written.", (), lambda: {(): audit_writer.queue.qsize()}
+)
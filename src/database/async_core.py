@@ -0,0 +1,54 @@
+import os
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from dotenv import load_dotenv
+from src.database.core import DATABASE_URL
+from src.database.instrumentation import instrument_engine
+from src.database.pool import pool_options
+from src.database.replicas import RoutingSession, build_replica_set
+
+load_dotenv()
+
+ASYNC_DRIVERS = {
+    "mysql": "aiomysql",
+    "sqlite": "aiosqlite",
+}
+
+
+def to_async_url(url: str) -> str:
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for database backend '{backend}'")
+    return parsed.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+
+def _create_async_replica(url: str):
+    # The sync facade of an async engine: RoutingSession runs inside the
+    # AsyncSession's greenlet, where it drives the async driver.
+    async_url = to_async_url(url)
+    return create_async_engine(async_url, echo=False, **pool_options(async_url, instrumented=False)).sync_engine
+
+
+USE_ASYNC_DB = os.getenv("USE_ASYNC_DB", "false").lower() in ("1", "true", "yes")
+
+async_engine = None
+AsyncSessionLocal = None
+
+if USE_ASYNC_DB:
+    ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_url(DATABASE_URL)
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL, echo=False, **pool_options(ASYNC_DATABASE_URL, instrumented=False)
+    )
+    instrument_engine(async_engine.sync_engine)
+    async_replicas = build_replica_set(
+        async_engine.sync_engine,
+        os.getenv("DATABASE_REPLICA_URLS", ""),
+        strategy=os.getenv("DATABASE_REPLICA_STRATEGY", "round_robin"),
+        cooldown=float(os.getenv("DATABASE_REPLICA_COOLDOWN", "30")),
+        create=_create_async_replica,
+    )
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine, class_=AsyncSession, sync_session_class=RoutingSession,
+        replicas=async_replicas, autoflush=False, expire_on_commit=False
+    )
@@ -2,6 +2,10 @@ import os
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
+from src.database.instrumentation import instrument_engine
+from src.database.pool import instrument_pool, pool_options
+from src.database.replicas import RoutingSession, build_replica_set
+from src.database.sql_registry import sql_registry
 
 load_dotenv()
 
@@ -9,10 +13,18 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL environment variable is not set")
 
-engine = create_engine(DATABASE_URL, echo=False, future=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+engine = create_engine(DATABASE_URL, echo=False, future=True, **pool_options(DATABASE_URL))
+instrument_engine(engine)
+instrument_pool(engine)
+# Comma-separated read replica URLs; read-only service functions are routed to them.
+replicas = build_replica_set(
+    engine,
+    os.getenv("DATABASE_REPLICA_URLS", ""),
+    strategy=os.getenv("DATABASE_REPLICA_STRATEGY", "round_robin"),
+    cooldown=float(os.getenv("DATABASE_REPLICA_COOLDOWN", "30")),
+)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, class_=RoutingSession, replicas=replicas)
 
 
 def load_sql(path: str) -> str:
-    base = os.path.join(os.path.dirname(__file__), "..", "sql")
-    return open(os.path.join(base, path), encoding="utf-8").read()
\ No newline at end of file
+    return sql_registry.source(path)
\ No newline at end of file
@@ -0,0 +1,68 @@
+import asyncio
+import os
+import time
+from dotenv import load_dotenv
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+from src.database.migrations import schema_version
+from src.database.pool import pool_status
+from src.logger import logger
+from src.sql.migrations.migrations import MIGRATIONS
+
+load_dotenv()
+
+DB_STARTUP_TIMEOUT = float(os.getenv("DB_STARTUP_TIMEOUT", "30"))
+DB_RETRY_BASE_DELAY = float(os.getenv("DB_RETRY_BASE_DELAY", "0.25"))
+DB_RETRY_MAX_DELAY = float(os.getenv("DB_RETRY_MAX_DELAY", "5"))
+READINESS_TIMEOUT = float(os.getenv("READINESS_TIMEOUT", "2"))
+
+EXPECTED_SCHEMA_VERSION = max((version for version, _, _ in MIGRATIONS), default=0)
+
+
+def ping(engine: Engine) -> None:
+    with engine.connect() as conn:
+        conn.exec_driver_sql("SELECT 1")
+
+
+async def wait_for_database(
+    engine: Engine,
+    timeout: float = DB_STARTUP_TIMEOUT,
+    base_delay: float = DB_RETRY_BASE_DELAY,
+    max_delay: float = DB_RETRY_MAX_DELAY,
+) -> None:
+    # Pings run in a worker thread and the waits are asyncio sleeps, so the
+    # event loop is never blocked while the database comes up.
+    deadline = time.monotonic() + timeout
+    delay = base_delay
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            await asyncio.to_thread(ping, engine)
+            return
+        except SQLAlchemyError as e:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logger.error("Database not reachable after %s attempts in %ss", attempt, timeout)
+                raise RuntimeError("Database init failed") from e
+            logger.warning("Attempt %s - DB not ready, retrying in %.2fs: %s", attempt, min(delay, remaining), e)
+            await asyncio.sleep(min(delay, remaining))
+            delay = min(delay * 2, max_delay)
+
+
+async def readiness(engine: Engine) -> dict:
+    # Bounded by READINESS_TIMEOUT so a saturated pool fails the probe instead
+    # of hanging it.
+    report = {"ready": False, "database": "ok", "pool": pool_status(engine)}
+    try:
+        version = await asyncio.wait_for(asyncio.to_thread(schema_version, engine), READINESS_TIMEOUT)
+    except asyncio.TimeoutError:
+        report["database"] = f"timed out after {READINESS_TIMEOUT}s"
+        return report
+    except SQLAlchemyError as e:
+        report["database"] = f"unavailable: {type(e).__name__}"
+        return report
+    report["schema_version"] = version
+    report["expected_schema_version"] = EXPECTED_SCHEMA_VERSION
+    report["ready"] = version >= EXPECTED_SCHEMA_VERSION
+    return report
@@ -0,0 +1,70 @@
+import os
+import time
+from contextvars import ContextVar
+from typing import Optional
+from dotenv import load_dotenv
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from src.logger import logger
+from src.utils.metrics import metrics
+
+load_dotenv()
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+SLOW_QUERY_MAX_CHARS = 2000
+
+query_duration = metrics.histogram(
+    "db_query_duration_seconds",
+    "Database statement latency by operation.",
+    ("operation",),
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+slow_queries = metrics.counter("db_slow_queries_total", "Statements slower than SLOW_QUERY_MS.", ("operation",))
+
+
+class QueryStats:
+    __slots__ = ("count", "seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+
+# Set per request by QueryStatsMiddleware. Sync routes run in a threadpool that
+# copies the context, and the object is shared, so their statements count too.
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("current_query_stats", default=None)
+
+
+def _operation(statement: str) -> str:
+    keyword = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    return keyword if keyword in ("SELECT", "INSERT", "UPDATE", "DELETE") else "OTHER"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+    operation = _operation(statement)
+    query_duration.observe(elapsed, (operation,))
+
+    stats = current_query_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += elapsed
+
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        slow_queries.inc((operation,))
+        # Parameters are left out on purpose: they carry emails and password hashes.
+        logger.warning(
+            "Slow query (%.1f ms%s): %s",
+            elapsed * 1000,
+            ", executemany" if executemany else "",
+            " ".join(statement.split())[:SLOW_QUERY_MAX_CHARS],
+        )
+
+
+def instrument_engine(engine: Engine) -> None:
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
@@ -0,0 +1,111 @@
+import hashlib
+import os
+from contextlib import contextmanager
+from typing import Dict, List, Sequence, Tuple
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+from src.logger import logger
+from src.sql.migrations.migrations import MIGRATIONS
+
+Migration = Tuple[int, str, str]
+
+SCHEMA_MIGRATIONS_TABLE = "schema_migrations"
+# Seconds a worker waits for another worker's migration run to finish.
+MIGRATION_LOCK_TIMEOUT = int(os.getenv("MIGRATION_LOCK_TIMEOUT", "60"))
+
+schema_migrations = f"""
+CREATE TABLE IF NOT EXISTS {SCHEMA_MIGRATIONS_TABLE} (
+    version INT PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    checksum CHAR(64) NOT NULL,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+
+class MigrationError(RuntimeError):
+    pass
+
+
+def checksum(sql: str) -> str:
+    # Whitespace-insensitive so reindenting a migration does not count as a change.
+    return hashlib.sha256(" ".join(sql.split()).encode()).hexdigest()
+
+
+def applied_migrations(conn: Connection) -> Dict[int, str]:
+    if not inspect(conn).has_table(SCHEMA_MIGRATIONS_TABLE):
+        return {}
+    rows = conn.execute(text(f"SELECT version, checksum FROM {SCHEMA_MIGRATIONS_TABLE}")).all()
+    return {version: digest for version, digest in rows}
+
+
+def pending_migrations(applied: Dict[int, str], migrations: Sequence[Migration] = MIGRATIONS) -> List[Migration]:
+    pending = []
+    for version, name, sql in migrations:
+        if version not in applied:
+            if len(statements(sql)) != 1:
+                raise MigrationError(f"Migration {version} ({name}) must hold exactly one statement")
+            pending.append((version, name, sql))
+        elif applied[version] != checksum(sql):
+            raise MigrationError(f"Migration {version} ({name}) was changed after it was applied")
+    return pending
+
+
+def statements(sql: str) -> List[str]:
+    return [statement.strip() for statement in sql.split(";") if statement.strip()]
+
+
+@contextmanager
+def migration_lock(conn: Connection, timeout: int = MIGRATION_LOCK_TIMEOUT):
+    # A MySQL named lock held by `conn`, so only one worker runs migrations and
+    # the others wait, then find them applied. SQLite serializes writers itself
+    # and runs unlocked.
+    if conn.dialect.name != "mysql":
+        yield
+        return
+    params = {"name": SCHEMA_MIGRATIONS_TABLE, "timeout": timeout}
+    if conn.execute(text("SELECT GET_LOCK(:name, :timeout)"), params).scalar() != 1:
+        raise MigrationError(f"Timed out after {timeout}s waiting for another process to finish migrating")
+    try:
+        yield
+    finally:
+        conn.execute(text("SELECT RELEASE_LOCK(:name)"), params)
+
+
+def schema_version(engine: Engine) -> int:
+    with engine.connect() as conn:
+        return max(applied_migrations(conn), default=0)
+
+
+def apply_migrations(
+    engine: Engine, migrations: Sequence[Migration] = MIGRATIONS, lock_timeout: int = MIGRATION_LOCK_TIMEOUT
+) -> int:
+    # An up-to-date schema costs one catalog lookup and one SELECT. Otherwise
+    # the run holds the migration lock and re-reads what is pending, so a
+    # worker that waited on another one's run applies nothing.
+    with engine.connect() as conn:
+        pending = pending_migrations(applied_migrations(conn), migrations)
+    if not pending:
+        logger.info("Database schema is up to date")
+        return 0
+
+    with engine.connect() as lock_conn, migration_lock(lock_conn, lock_timeout):
+        with engine.begin() as conn:
+            conn.execute(text(schema_migrations))
+            pending = pending_migrations(applied_migrations(conn), migrations)
+        for version, name, sql in pending:
+            with engine.begin() as conn:
+                conn.execute(text(statements(sql)[0]))
+                conn.execute(
+                    text(f"INSERT INTO {SCHEMA_MIGRATIONS_TABLE} (version, name, checksum) VALUES (:version, :name, :checksum)"),
+                    {"version": version, "name": name, "checksum": checksum(sql)},
+                )
+            logger.info("Applied migration %s (%s)", version, name)
+    return len(pending)
+
+
+if __name__ == "__main__":
+    # Run migrations as a separate deploy step, then start the app with RUN_MIGRATIONS=false.
+    from src.database.core import engine
+
+    apply_migrations(engine)
@@ -0,0 +1,108 @@
+import os
+import time
+from dotenv import load_dotenv
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import QueuePool
+from src.logger import logger
+from src.utils.metrics import metrics
+
+load_dotenv()
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+# Below MySQL's wait_timeout so idle connections are replaced before the server drops them.
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+DB_POOL_WARM = int(os.getenv("DB_POOL_WARM", str(DB_POOL_SIZE)))
+
+checkout_wait = metrics.histogram(
+    "db_pool_checkout_seconds",
+    "Time to check a connection out of the pool, including connecting when the pool grows.",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0),
+)
+checkout_timeouts = metrics.counter("db_pool_checkout_timeouts_total", "Checkouts that gave up after DB_POOL_TIMEOUT.")
+connection_events = metrics.counter(
+    "db_pool_connection_events_total", "DBAPI connections opened, closed and invalidated.", ("event",)
+)
+
+
+class InstrumentedQueuePool(QueuePool):
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            checkout_timeouts.inc()
+            raise
+        finally:
+            checkout_wait.observe(time.perf_counter() - start)
+
+
+def pool_options(url: str, instrumented: bool = True) -> dict:
+    options = {"pool_pre_ping": DB_POOL_PRE_PING, "pool_recycle": DB_POOL_RECYCLE}
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and (
+        parsed.database in (None, "", ":memory:") or parsed.get_driver_name() == "aiosqlite"
+    ):
+        # In-memory SQLite uses a per-thread singleton pool and aiosqlite a
+        # NullPool; neither can be sized.
+        return options
+    options.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_timeout=DB_POOL_TIMEOUT)
+    if instrumented:
+        options["poolclass"] = InstrumentedQueuePool
+    return options
+
+
+def pool_status(engine: Engine) -> dict:
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return {"class": type(pool).__name__}
+    checked_out = pool.checkedout()
+    capacity = DB_POOL_SIZE + max(DB_MAX_OVERFLOW, 0)
+    return {
+        "class": type(pool).__name__,
+        "size": pool.size(),
+        "checked_out": checked_out,
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "saturation": checked_out / capacity if capacity else 0.0,
+    }
+
+
+def _pool_state(engine: Engine) -> dict:
+    status = pool_status(engine)
+    return {(key,): status[key] for key in ("checked_out", "idle", "overflow", "saturation") if key in status}
+
+
+def instrument_pool(engine: Engine) -> None:
+    for name in ("connect", "close", "invalidate", "soft_invalidate", "close_detached"):
+        event.listen(engine, name, lambda *args, _event=name: connection_events.inc((_event,)))
+    metrics.callback_gauge(
+        "db_pool",
+        "Connections checked out, idle and in overflow, and checked-out share of size + overflow.",
+        ("state",),
+        lambda: _pool_state(engine),
+    )
+
+
+def warm_pool(engine: Engine, count: int = DB_POOL_WARM) -> int:
+    # Holds `count` connections at once so each is a distinct DBAPI connection,
+    # then returns them all to the pool ready for the first requests. Only
+    # DB_POOL_SIZE connections are kept on return (overflow ones are closed), and
+    # asking for more than size + overflow would wait for DB_POOL_TIMEOUT.
+    if isinstance(engine.pool, QueuePool) and count > DB_POOL_SIZE:
+        logger.warning("DB_POOL_WARM=%s is above DB_POOL_SIZE=%s, warming %s", count, DB_POOL_SIZE, DB_POOL_SIZE)
+        count = DB_POOL_SIZE
+    connections = []
+    try:
+        for _ in range(count):
+            connection = engine.connect()
+            connections.append(connection)
+            connection.exec_driver_sql("SELECT 1")
+    finally:
+        for connection in connections:
+            connection.close()
+    logger.info("Warmed database pool with %s connections", len(connections))
+    return len(connections)
@@ -0,0 +1,169 @@
+import functools
+import inspect
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, List, Optional
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import InterfaceError, OperationalError
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import TextClause
+from sqlalchemy.pool import QueuePool
+from src.database.instrumentation import instrument_engine
+from src.database.pool import pool_options
+from src.logger import logger
+
+# session.info keys
+REPLICA_READS = "replica_reads"
+PRIMARY_PINNED = "primary_pinned"
+
+# Errors that mean the replica itself is unusable rather than the statement being wrong.
+REPLICA_ERRORS = (OperationalError, InterfaceError)
+
+READ_KEYWORDS = ("SELECT", "WITH", "SHOW", "EXPLAIN", "DESCRIBE")
+
+
+def is_write(statement) -> bool:
+    # The service layer runs raw SQL through text(), so those are classified by
+    # their first keyword; anything unrecognised counts as a write.
+    if isinstance(statement, TextClause):
+        words = statement.text.split(None, 1)
+        return not words or words[0].upper() not in READ_KEYWORDS
+    return not getattr(statement, "is_select", False)
+
+
+class ReplicaSet:
+    # Picks a healthy replica per read. A replica that fails is skipped for
+    # `cooldown` seconds and its reads go to the primary in the meantime.
+    def __init__(self, primary: Engine, replicas: List[Engine], strategy: str = "round_robin", cooldown: float = 30.0):
+        if strategy not in ("round_robin", "least_busy"):
+            raise ValueError(f"Unknown replica strategy '{strategy}'")
+        self.primary = primary
+        self.replicas = replicas
+        self.strategy = strategy
+        self.cooldown = cooldown
+        self._unhealthy_until = {id(replica): 0.0 for replica in replicas}
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def __bool__(self) -> bool:
+        return bool(self.replicas)
+
+    @staticmethod
+    def _busy(replica: Engine) -> int:
+        pool = replica.pool
+        return pool.checkedout() if isinstance(pool, QueuePool) else 0
+
+    def choose(self) -> Optional[Engine]:
+        now = time.monotonic()
+        healthy = [replica for replica in self.replicas if self._unhealthy_until[id(replica)] <= now]
+        if not healthy:
+            return None
+        if self.strategy == "least_busy":
+            return min(healthy, key=self._busy)
+        return healthy[next(self._counter) % len(healthy)]
+
+    def mark_unhealthy(self, replica: Engine, error: Exception) -> None:
+        with self._lock:
+            self._unhealthy_until[id(replica)] = time.monotonic() + self.cooldown
+        logger.warning(
+            "Replica %s failed, reading from primary for %ss: %s",
+            replica.url.render_as_string(hide_password=True), self.cooldown, error,
+        )
+
+    def connect_for_read(self) -> Connection:
+        replica = self.choose()
+        if replica is not None:
+            try:
+                return replica.connect()
+            except REPLICA_ERRORS as e:
+                self.mark_unhealthy(replica, e)
+        return self.primary.connect()
+
+
+def _routable(kwargs: dict) -> bool:
+    # Statements with their own bind or execution options go through the normal
+    # path. AsyncSession always passes prebuffer_rows, which a buffered replica
+    # result already satisfies.
+    options = dict(kwargs.get("execution_options") or {})
+    options.pop("prebuffer_rows", None)
+    return not options and not kwargs.get("bind_arguments") and set(kwargs) <= {"execution_options", "bind_arguments"}
+
+
+class RoutingSession(Session):
+    # Statements issued inside `replica_reads` go to a replica on their own
+    # connection and are buffered, so a replica that fails mid-read can be
+    # retried on the primary. Once the session writes (a statement, a flush or
+    # a commit) it is pinned to the primary, so the rest of the request reads
+    # its own writes, including ones not yet committed.
+    def __init__(self, *args, replicas: Optional[ReplicaSet] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replicas = replicas
+
+    def execute(self, statement, params=None, **kwargs):
+        if self.replicas and is_write(statement):
+            self.info[PRIMARY_PINNED] = True
+        if not _routable(kwargs) or not self.replicas or not self.info.get(REPLICA_READS) or self.info.get(PRIMARY_PINNED):
+            return super().execute(statement, params, **kwargs)
+        replica = self.replicas.choose()
+        if replica is not None:
+            try:
+                with replica.connect() as connection:
+                    return connection.execute(statement, params).freeze()()
+            except REPLICA_ERRORS as e:
+                self.replicas.mark_unhealthy(replica, e)
+        return super().execute(statement, params, **kwargs)
+
+
+@event.listens_for(RoutingSession, "after_flush")
+@event.listens_for(RoutingSession, "after_commit")
+def _pin_to_primary(session: Session, *args) -> None:
+    session.info[PRIMARY_PINNED] = True
+
+
+@contextmanager
+def replica_reads(session: Session):
+    previous = session.info.get(REPLICA_READS, False)
+    session.info[REPLICA_READS] = True
+    try:
+        yield session
+    finally:
+        session.info[REPLICA_READS] = previous
+
+
+def reads_from_replica(func: Callable) -> Callable:
+    # For service functions that only read and take the session as first argument.
+    # An AsyncSession shares `info` with the RoutingSession it wraps, so the same
+    # flag routes async service functions.
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(session, *args, **kwargs):
+            with replica_reads(session):
+                return await func(session, *args, **kwargs)
+
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(session: Session, *args, **kwargs):
+        with replica_reads(session):
+            return func(session, *args, **kwargs)
+
+    return wrapper
+
+
+def _create_replica(url: str) -> Engine:
+    return create_engine(url, echo=False, future=True, **pool_options(url))
+
+
+def build_replica_set(
+    primary: Engine, urls: str, strategy: str = "round_robin", cooldown: float = 30.0,
+    create: Callable[[str], Engine] = _create_replica,
+) -> ReplicaSet:
+    replicas = []
+    for url in filter(None, (part.strip() for part in urls.split(","))):
+        replica = create(url)
+        instrument_engine(replica)
+        replicas.append(replica)
+    return ReplicaSet(primary, replicas, strategy=strategy, cooldown=cooldown)
@@ -0,0 +1,93 @@
+import os
+import threading
+from typing import Dict, Iterable, Tuple
+from sqlalchemy import bindparam, text
+from sqlalchemy.sql.elements import TextClause
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SQL_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "sql"))
+
+
+class SQLRegistry:
+    def __init__(self, base_dir: str = SQL_DIR, hot_reload: bool = False):
+        self.base_dir = base_dir
+        self.hot_reload = hot_reload
+        self._statements: Dict[str, TextClause] = {}
+        self._sources: Dict[str, str] = {}
+        self._mtimes: Dict[str, float] = {}
+        self._expanded: Dict[Tuple[str, Tuple[str, ...]], TextClause] = {}
+        self._lock = threading.Lock()
+        self.load_all()
+
+    @staticmethod
+    def _normalize(name: str) -> str:
+        name = name.replace("\\", "/")
+        return name[:-4] if name.endswith(".sql") else name
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.base_dir, *name.split("/")) + ".sql"
+
+    def _load(self, name: str) -> None:
+        path = self._path(name)
+        with open(path, encoding="utf-8") as f:
+            source = f.read()
+        self._sources[name] = source
+        self._statements[name] = text(source)
+        self._mtimes[name] = os.path.getmtime(path)
+        for key in [k for k in self._expanded if k[0] == name]:
+            del self._expanded[key]
+
+    def load_all(self) -> None:
+        with self._lock:
+            for root, _, files in os.walk(self.base_dir):
+                for filename in files:
+                    if not filename.endswith(".sql"):
+                        continue
+                    rel = os.path.relpath(os.path.join(root, filename), self.base_dir)
+                    self._load(self._normalize(rel))
+
+    def _reload_if_changed(self, name: str) -> None:
+        try:
+            mtime = os.path.getmtime(self._path(name))
+        except OSError:
+            return
+        if mtime != self._mtimes.get(name):
+            with self._lock:
+                self._load(name)
+
+    def get(self, name: str, expanding: Iterable[str] = ()) -> TextClause:
+        name = self._normalize(name)
+        if name not in self._statements:
+            raise KeyError(f"SQL statement '{name}' not found in {self.base_dir}")
+        if self.hot_reload:
+            self._reload_if_changed(name)
+        expanding = tuple(expanding)
+        if not expanding:
+            return self._statements[name]
+        key = (name, expanding)
+        stmt = self._expanded.get(key)
+        if stmt is None:
+            stmt = self._statements[name].bindparams(
+                *(bindparam(param, expanding=True) for param in expanding)
+            )
+            self._expanded[key] = stmt
+        return stmt
+
+    def source(self, name: str) -> str:
+        self.get(name)
+        return self._sources[self._normalize(name)]
+
+    def require(self, *names: str) -> None:
+        missing = [n for n in names if self._normalize(n) not in self._statements]
+        if missing:
+            raise RuntimeError(f"Missing SQL statements: {', '.join(missing)}")
+
+    def names(self) -> list:
+        return sorted(self._statements)
+
+
+sql_registry = SQLRegistry(
+    hot_reload=os.getenv("SQL_HOT_RELOAD", "false").lower() in ("1", "true", "yes")
+)
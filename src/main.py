@@ -87,37 +87,86 @@ async def rate_limit_error_handler(request: Request, exc: RateLimitExceeded):
 '''
 
 import os
-import time
+import asyncio
 from fastapi import FastAPI, Request
-from sqlalchemy import text
-from sqlalchemy.exc import OperationalError, SQLAlchemyError
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
+from fastapi.responses import PlainTextResponse
 from starlette.status import HTTP_422_UNPROCESSABLE_ENTITY
 
-from src.users.router import router as user_router
+from src.users.router import IMPORT_MAX_LINE_BYTES, router as user_router
 from src.utils.response_builder import make_response
-from src.middlewares.sanitization import BlockMaliciousPayloadMiddleware
+from src.utils.fast_json_response import FastJSONResponse
+from src.middlewares.sanitization import BlockMaliciousPayloadMiddleware, load_patterns
 from src.logger import logger
 from src.database.core import engine
-from src.sql.migrations.migrations import users, audit_logs
-from src.middlewares.rate_limiter import RateLimiterMiddleware
+from src.database.pool import warm_pool
+from src.database.health import readiness, wait_for_database
+from src.database.migrations import apply_migrations
+from src.database.async_core import USE_ASYNC_DB, async_engine
+from src.users.cache import user_cache
+from src.utils.jwt_handler import token_cache
+from src.audit.writer import audit_writer
+from src.audit.router import router as audit_router
+from src.audit.service import start_retention_job
+from src.middlewares.rate_limiter import RateLimiterMiddleware, parse_route_limits
+from src.middlewares.rate_limit_store import build_rate_limit_store
+from src.middlewares.metrics import MetricsMiddleware
+from src.middlewares.query_stats import QueryStatsMiddleware
+from src.middlewares.compression import CompressionMiddleware
+from src.utils.metrics import EXPOSITION_CONTENT_TYPE, metrics
 
 os.makedirs("logs", exist_ok=True) 
-app = FastAPI()
-
-app.add_middleware(BlockMaliciousPayloadMiddleware)
-app.add_middleware(RateLimiterMiddleware, max_requests=10, period=60)              
-
+RUN_MIGRATIONS = os.getenv("RUN_MIGRATIONS", "true").lower() in ("1", "true", "yes")
+app = FastAPI(default_response_class=FastJSONResponse)
+
+rate_limit_store = build_rate_limit_store(
+    os.getenv("RATE_LIMIT_BACKEND", "memory"),
+    max_keys=int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000")),
+)
+
+SANITIZER_PATTERNS_FILE = os.getenv("SANITIZER_PATTERNS_FILE")
+app.add_middleware(
+    BlockMaliciousPayloadMiddleware,
+    patterns=load_patterns(SANITIZER_PATTERNS_FILE) if SANITIZER_PATTERNS_FILE else None,
+    scan_raw_body=os.getenv("SANITIZER_SCAN_RAW_BODY", "false").lower() in ("1", "true", "yes"),
+    max_body_size=int(os.getenv("MAX_BODY_BYTES", str(2 * 1024 * 1024))),
+    max_line_size=IMPORT_MAX_LINE_BYTES,
+    max_stream_size=int(os.getenv("IMPORT_MAX_BODY_BYTES", str(100 * 1024 * 1024))),
+)
+app.add_middleware(
+    RateLimiterMiddleware,
+    max_requests=10,
+    period=60,
+    route_limits=parse_route_limits(os.getenv("RATE_LIMIT_ROUTES", "")),
+    store=rate_limit_store,
+)
+app.add_middleware(QueryStatsMiddleware, query_budget=int(os.getenv("QUERY_BUDGET", "0")))
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=int(os.getenv("COMPRESSION_MIN_SIZE", "1024")),
+    levels={
+        "gzip": int(os.getenv("COMPRESSION_GZIP_LEVEL", "6")),
+        "br": int(os.getenv("COMPRESSION_BROTLI_LEVEL", "4")),
+        "zstd": int(os.getenv("COMPRESSION_ZSTD_LEVEL", "3")),
+    },
+    preference=[part.strip() for part in os.getenv("COMPRESSION_ENCODINGS", "zstd,br,gzip").split(",") if part.strip()],
+)
+# Added last so it is outermost and also times rejected and rate limited requests.
+app.add_middleware(MetricsMiddleware)
+
+if USE_ASYNC_DB:
+    from src.users.async_router import router as async_user_router
+    app.include_router(async_user_router)
 app.include_router(user_router)
+app.include_router(audit_router)
 
 @app.exception_handler(RequestValidationError)
 async def request_validation_exception_handler(request: Request, exc: RequestValidationError):
     errors = exc.errors()
-    logger.warning(f"Validation Error on {request.url}: {errors}")
+    logger.warning("Validation Error on %s: %s", request.url, errors)
     first_msg = errors[0].get("msg", "Validation error.") if errors else "Validation error."
 
-    return JSONResponse(
+    return FastJSONResponse(
         status_code=HTTP_422_UNPROCESSABLE_ENTITY,
         content=make_response(data=None, status=HTTP_422_UNPROCESSABLE_ENTITY, message=first_msg)
     )
@@ -127,24 +176,62 @@ def root():
     logger.info("Healthcheck endpoint hit")
     return {"message": "I AM ALIVE"}
 
+@app.get("/readiness")
+async def readiness_probe():
+    report = await readiness(engine)
+    return FastJSONResponse(status_code=200 if report["ready"] else 503, content=report)
+
+@app.get("/cache/stats")
+def cache_stats():
+    return {"users": user_cache.stats(), "jwt_tokens": token_cache.stats()}
+
+metrics.callback_gauge(
+    "user_cache_stats",
+    "User cache counters and sizes from /cache/stats.",
+    ("stat",),
+    lambda: {(key,): value for key, value in user_cache.stats().items() if isinstance(value, (int, float))},
+)
+
+@app.get("/metrics", include_in_schema=False)
+def metrics_endpoint():
+    return PlainTextResponse(metrics.render(), media_type=EXPOSITION_CONTENT_TYPE)
+
 @app.on_event("startup")
 async def initialize_database():
-    max_retries = 10
-    delay = 3
+    await wait_for_database(engine)
+    if RUN_MIGRATIONS:
+        await asyncio.to_thread(apply_migrations, engine)
 
-    for attempt in range(max_retries):
-        try:
-            with engine.begin() as conn:
-                conn.execute(text(users))
-                conn.execute(text(audit_logs))
-            logger.info("Database tables initialized successfully")
-            return
-        except (OperationalError, SQLAlchemyError) as e:
-            logger.warning(f"Attempt {attempt + 1}/{max_retries} - DB not ready: {e}")
-            time.sleep(delay)
-        except Exception as e:
-            logger.error(f"Unexpected error: {e}")
-            raise
 
-    logger.error("Failed to initialize database after multiple retries")
-    raise RuntimeError("Database init failed")
+@app.on_event("startup")
+async def start_audit_writer():
+    # After migrations, so audit_logs exists before spilled events are replayed.
+    await asyncio.to_thread(audit_writer.start)
+    start_retention_job(engine)
+
+
+@app.on_event("startup")
+async def warm_database_pool():
+    # Runs after initialize_database, so the server is known to be reachable.
+    await asyncio.to_thread(warm_pool, engine)
+
+
+@app.on_event("startup")
+async def start_metrics_flusher():
+    metrics.start_flusher(float(os.getenv("METRICS_FLUSH_INTERVAL", "5")))
+
+
+@app.on_event("shutdown")
+async def drain_audit_writer():
+    await asyncio.to_thread(audit_writer.close)
+
+
+@app.on_event("shutdown")
+async def dispose_async_engine():
+    if async_engine is not None:
+        await async_engine.dispose()
+
+
+@app.on_event("shutdown")
+async def close_rate_limit_store():
+    await rate_limit_store.close()
@@ -0,0 +1,203 @@
+import zlib
+from typing import Dict, Optional, Sequence
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from src.utils.etags import encoded_etag
+from src.utils.metrics import metrics
+
+try:
+    import brotli
+except ImportError:  # optional dependency, "br" is not offered without it
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional dependency, "zstd" is not offered without it
+    zstandard = None
+
+# Bodies that are already compressed gain nothing but CPU cost.
+SKIP_CONTENT_TYPES = (
+    "image/", "video/", "audio/", "font/woff",
+    "application/zip", "application/gzip", "application/x-gzip", "application/zstd",
+    "application/x-brotli", "application/octet-stream", "application/pdf",
+)
+
+compression_bytes = metrics.counter(
+    "http_compression_bytes_total", "Response bytes before (in) and after (out) compression.", ("encoding", "direction")
+)
+
+
+class GzipEncoder:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class BrotliEncoder:
+    def __init__(self, level: int):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class ZstdEncoder:
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+ENCODERS = {"gzip": GzipEncoder}
+if brotli is not None:
+    ENCODERS["br"] = BrotliEncoder
+if zstandard is not None:
+    ENCODERS["zstd"] = ZstdEncoder
+
+DEFAULT_LEVELS = {"zstd": 3, "br": 4, "gzip": 6}
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    accepted = {}
+    for item in filter(None, (part.strip() for part in header.split(","))):
+        coding, _, params = item.partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    return accepted
+
+
+def negotiate(header: str, preference: Sequence[str]) -> Optional[str]:
+    # The server's preference decides among codings the client accepts with q > 0.
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get("*", 0.0)
+    for coding in preference:
+        if accepted.get(coding, wildcard) > 0:
+            return coding
+    return None
+
+
+class CompressionMiddleware:
+    # Compresses responses for clients that accept one of `preference`
+    # (zstd and br only when their packages are installed). A complete body
+    # is compressed at once and skipped when shorter than `minimum_size`;
+    # a streamed body is compressed chunk by chunk with a flush after each, so
+    # the client still receives every chunk as soon as the app sends it.
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        levels: Optional[Dict[str, int]] = None,
+        preference: Sequence[str] = ("zstd", "br", "gzip"),
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.levels = {**DEFAULT_LEVELS, **(levels or {})}
+        self.preference = tuple(coding for coding in preference if coding in ENCODERS)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        coding = negotiate(Headers(scope=scope).get("accept-encoding", ""), self.preference)
+        if coding is None:
+            await self.app(scope, receive, send)
+            return
+        if_none_match = Headers(scope=scope).get("if-none-match", "")
+        await _CompressedResponder(self, coding, if_none_match)(self.app, scope, receive, send)
+
+
+class _CompressedResponder:
+    def __init__(self, middleware: CompressionMiddleware, coding: str, if_none_match: str = ""):
+        self.middleware = middleware
+        self.coding = coding
+        self.if_none_match = if_none_match
+        self.start: Optional[Message] = None
+        self.encoder = None
+        self.passthrough = False
+
+    async def __call__(self, app: ASGIApp, scope: Scope, receive: Receive, send: Send):
+        self.send = send
+        await app(scope, receive, self.send_wrapper)
+
+    def _skip(self, headers: Headers) -> bool:
+        content_type = headers.get("content-type", "").lower()
+        return "content-encoding" in headers or content_type.startswith(SKIP_CONTENT_TYPES)
+
+    def _not_modified_etag(self, headers: MutableHeaders) -> None:
+        # The app answers 304 with the identity tag; a client revalidating the
+        # compressed body sent the encoded one and must get that back.
+        etag = headers.get("etag")
+        if etag and encoded_etag(etag, self.coding) in self.if_none_match:
+            headers["ETag"] = encoded_etag(etag, self.coding)
+
+    async def send_wrapper(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            self.passthrough = self._skip(Headers(raw=message["headers"]))
+            if self.passthrough:
+                await self.send(message)
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.encoder is None:
+            # Set on every response that could have been compressed, so caches
+            # key on Accept-Encoding even when this one was sent as is.
+            headers = MutableHeaders(raw=self.start["headers"])
+            headers.add_vary_header("Accept-Encoding")
+            if not more_body and len(body) < self.middleware.minimum_size:
+                if self.start["status"] == 304:
+                    self._not_modified_etag(headers)
+                self.passthrough = True
+                await self.send(self.start)
+                await self.send(message)
+                return
+            self.encoder = ENCODERS[self.coding](self.middleware.levels[self.coding])
+            headers["Content-Encoding"] = self.coding
+            if "etag" in headers:
+                headers["ETag"] = encoded_etag(headers["etag"], self.coding)
+            if more_body:
+                del headers["content-length"]
+                compressed = self.encoder.compress(body) + self.encoder.flush()
+            else:
+                compressed = self.encoder.compress(body) + self.encoder.finish()
+                headers["Content-Length"] = str(len(compressed))
+            await self.send(self.start)
+        elif more_body:
+            compressed = self.encoder.compress(body) + self.encoder.flush()
+        else:
+            compressed = self.encoder.compress(body) + self.encoder.finish()
+
+        compression_bytes.inc((self.coding, "in"), len(body))
+        compression_bytes.inc((self.coding, "out"), len(compressed))
+        await self.send({"type": "http.response.body", "body": compressed, "more_body": more_body})
@@ -0,0 +1,47 @@
+import time
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from src.utils.metrics import metrics
+
+# Requests that never reach a route (404s, rate limited or blocked before routing)
+# share one label value so arbitrary paths cannot blow up label cardinality.
+UNMATCHED_ROUTE = "<unmatched>"
+
+http_requests = metrics.counter(
+    "http_requests_total", "HTTP requests by route and status class.", ("method", "route", "status")
+)
+http_latency = metrics.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route.", ("method", "route")
+)
+http_in_flight = metrics.gauge("http_requests_in_flight", "HTTP requests currently being served.", ("method",))
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_in_flight.inc((method,))
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_in_flight.dec((method,))
+            # FastAPI's router stores the matched route on the shared scope.
+            route = scope.get("route")
+            path = getattr(route, "path", UNMATCHED_ROUTE)
+            http_requests.inc((method, path, f"{status // 100}xx"))
+            http_latency.observe(elapsed, (method, path))
@@ -0,0 +1,53 @@
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from src.database.instrumentation import QueryStats, current_query_stats
+from src.logger import logger
+from src.middlewares.metrics import UNMATCHED_ROUTE
+from src.utils.metrics import metrics
+
+queries_per_request = metrics.histogram(
+    "db_queries_per_request",
+    "Statements executed per HTTP request by route.",
+    ("route",),
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+db_time_per_request = metrics.histogram(
+    "db_time_per_request_seconds", "Total statement time per HTTP request by route.", ("route",)
+)
+
+
+class QueryStatsMiddleware:
+    # Adds a Server-Timing header with the database time spent before the response
+    # started and warns when a request runs more than `query_budget` statements.
+    def __init__(self, app: ASGIApp, query_budget: int = 0):
+        self.app = app
+        self.query_budget = query_budget
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = current_query_stats.set(stats)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing", f'db;dur={stats.seconds * 1000:.1f};desc="{stats.count} queries"'
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_query_stats.reset(token)
+            route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            queries_per_request.observe(stats.count, (route,))
+            db_time_per_request.observe(stats.seconds, (route,))
+            if self.query_budget and stats.count > self.query_budget:
+                logger.warning(
+                    "%s %s ran %s queries, over the budget of %s (possible N+1)",
+                    scope["method"], route, stats.count, self.query_budget,
+                )
@@ -0,0 +1,254 @@
+import asyncio
+import fcntl
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+try:
+    import redis.asyncio as redis_asyncio
+except ImportError:  # optional dependency, only needed for RATE_LIMIT_BACKEND=redis
+    redis_asyncio = None
+
+logger = logging.getLogger("rate-limiter")
+
+
+def sliding_window_hit(
+    window: float, previous: int, current: int, now: float, period: float, limit: int
+) -> Tuple[bool, float, int, int]:
+    # Keeps the previous and current window counts and weights the previous one by
+    # how much of it still overlaps the sliding period, so state is three numbers
+    # regardless of the limit.
+    new_window, offset = divmod(now, period)
+    if new_window != window:
+        previous = current if new_window == window + 1 else 0
+        current = 0
+        window = new_window
+    if previous * (1.0 - offset / period) + current >= limit:
+        return False, window, previous, current
+    return True, window, previous, current + 1
+
+
+class RateLimitStore:
+    async def hit(self, key: str, limit: int, period: float, now: float) -> bool:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+class SlidingWindowCounter:
+    __slots__ = ("period", "window", "previous", "current")
+
+    def __init__(self, period: float, now: float):
+        self.period = period
+        self.window = now // period
+        self.previous = 0
+        self.current = 0
+
+    def idle(self, now: float) -> bool:
+        # Nothing from two windows ago affects the estimate any more.
+        return (self.window + 2) * self.period <= now
+
+    def hit(self, now: float, limit: int) -> bool:
+        allowed, self.window, self.previous, self.current = sliding_window_hit(
+            self.window, self.previous, self.current, now, self.period, limit
+        )
+        return allowed
+
+
+class InMemoryStore(RateLimitStore):
+    # Per-process only: with N workers each client effectively gets N x the limit.
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self.counters: "OrderedDict[str, SlidingWindowCounter]" = OrderedDict()
+        self.evictions = 0
+
+    def _evict(self, now: float) -> None:
+        # Keys are kept in least-recently-seen order, so idle ones sit at the front.
+        counters = self.counters
+        while counters:
+            if len(counters) <= self.max_keys and not counters[next(iter(counters))].idle(now):
+                break
+            counters.popitem(last=False)
+            self.evictions += 1
+
+    def allow(self, key: str, limit: int, period: float, now: float) -> bool:
+        counter = self.counters.get(key)
+        if counter is None:
+            counter = SlidingWindowCounter(period, now)
+            self.counters[key] = counter
+            self._evict(now)
+        else:
+            self.counters.move_to_end(key)
+        return counter.hit(now, limit)
+
+    async def hit(self, key, limit, period, now):
+        return self.allow(key, limit, period, now)
+
+
+class SharedMemoryStore(RateLimitStore):
+    # Fixed-size open-addressing table in a memory-mapped file shared by every
+    # worker on the host (put it on /dev/shm). Each slot is guarded by a POSIX
+    # byte-range lock on the probe range, so workers only contend on the same
+    # bucket. Keys are stored as 64-bit hashes; when a probe range is full the
+    # stalest slot is reused, which bounds memory at slots * SLOT.size bytes.
+    SLOT = struct.Struct("<QdII")
+    LOCK_RETRY_DELAYS = (0, 0.0005, 0.002)
+
+    def __init__(self, path: str, slots: int = 262_144, max_probe: int = 8):
+        self.path = path
+        self.slots = slots
+        self.max_probe = max_probe
+        size = slots * self.SLOT.size
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(self.fd).st_size < size:
+            os.ftruncate(self.fd, size)
+        self.map = mmap.mmap(self.fd, size)
+        # POSIX record locks never conflict within one process, so threads of
+        # this worker also take an in-process lock.
+        self._lock = threading.Lock()
+
+    def _hash(self, key: str) -> int:
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "little") or 1
+
+    def allow(self, key: str, limit: int, period: float, now: float, blocking: bool = True) -> Optional[bool]:
+        # Returns None when `blocking` is false and another worker or thread holds
+        # the probe range.
+        key_hash = self._hash(key)
+        first = key_hash % (self.slots - self.max_probe + 1)
+        start = first * self.SLOT.size
+        length = self.max_probe * self.SLOT.size
+        if not self._lock.acquire(blocking):
+            return None
+        try:
+            fcntl.lockf(self.fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB, length, start, os.SEEK_SET)
+        except OSError:
+            self._lock.release()
+            if blocking:
+                raise
+            return None
+        try:
+            target, stalest, stalest_window = None, start, float("inf")
+            for offset in range(start, start + length, self.SLOT.size):
+                slot_hash, window, previous, current = self.SLOT.unpack_from(self.map, offset)
+                if slot_hash == key_hash or slot_hash == 0:
+                    target = offset
+                    break
+                if window < stalest_window:
+                    stalest, stalest_window = offset, window
+            if target is None:
+                target, slot_hash = stalest, 0
+            if slot_hash != key_hash:
+                window, previous, current = now // period, 0, 0
+            allowed, window, previous, current = sliding_window_hit(window, previous, current, now, period, limit)
+            self.SLOT.pack_into(self.map, target, key_hash, window, previous, current)
+            return allowed
+        finally:
+            fcntl.lockf(self.fd, fcntl.LOCK_UN, length, start, os.SEEK_SET)
+            self._lock.release()
+
+    async def hit(self, key, limit, period, now):
+        # Uncontended, the locks and the slot update take about 7us, against
+        # roughly 100us for a hop to a thread, so the event loop tries them
+        # directly. Blocking on a bucket another worker holds would stall every
+        # request on this worker, so the loop only try-locks, backs off briefly,
+        # and then hands the blocking wait to a thread.
+        for delay in self.LOCK_RETRY_DELAYS:
+            allowed = self.allow(key, limit, period, now, blocking=False)
+            if allowed is not None:
+                return allowed
+            await asyncio.sleep(delay)
+        return await asyncio.to_thread(self.allow, key, limit, period, now)
+
+    async def close(self) -> None:
+        self.map.close()
+        os.close(self.fd)
+
+
+SLIDING_WINDOW_LUA = """
+local limit = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local window = math.floor(now / period)
+local state = redis.call('HMGET', KEYS[1], 'w', 'p', 'c')
+local w = tonumber(state[1])
+local previous = tonumber(state[2]) or 0
+local current = tonumber(state[3]) or 0
+if w ~= window then
+    if w == window - 1 then previous = current else previous = 0 end
+    current = 0
+end
+local allowed = 0
+if previous * (1 - (now - window * period) / period) + current < limit then
+    current = current + 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'w', window, 'p', previous, 'c', current)
+redis.call('PEXPIRE', KEYS[1], math.ceil(period * 2000))
+return allowed
+"""
+
+
+class RedisStore(RateLimitStore):
+    # Shared across nodes. The window arithmetic runs atomically in a Lua script
+    # using the Redis clock, so app servers never need synchronised clocks.
+    # Hits issued in the same event-loop tick are sent as one pipeline, which
+    # keeps bursts to a single round trip. Pass `client` to use any redis-py
+    # compatible asyncio client, e.g. fakeredis for an in-process server.
+    def __init__(self, url: Optional[str] = None, client=None, prefix: str = "ratelimit:", fail_open: bool = True):
+        if client is None:
+            if redis_asyncio is None:
+                raise RuntimeError("RATE_LIMIT_BACKEND=redis requires the 'redis' package")
+            client = redis_asyncio.from_url(url)
+        self.client = client
+        self.prefix = prefix
+        self.fail_open = fail_open
+        self.script = client.register_script(SLIDING_WINDOW_LUA)
+        self._pending: List[Tuple[str, int, float, asyncio.Future]] = []
+
+    async def hit(self, key, limit, period, now):
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((self.prefix + key, limit, period, future))
+        if len(self._pending) == 1:
+            # The flush task first runs on the next loop iteration, so every hit
+            # queued during this tick goes out in the same pipeline.
+            self._flush_task = asyncio.ensure_future(self._flush())
+        return await future
+
+    async def _flush(self) -> None:
+        batch, self._pending = self._pending, []
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                for key, limit, period, _ in batch:
+                    await self.script(keys=[key], args=[limit, period], client=pipe)
+                results = await pipe.execute()
+        except Exception:
+            logger.exception("Rate limit backend unavailable, %s", "allowing" if self.fail_open else "rejecting")
+            results = [self.fail_open] * len(batch)
+        for (_, _, _, future), allowed in zip(batch, results):
+            if not future.done():
+                future.set_result(bool(allowed))
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+def build_rate_limit_store(backend: str, max_keys: int = 100_000) -> RateLimitStore:
+    backend = backend.lower()
+    if backend == "memory":
+        return InMemoryStore(max_keys=max_keys)
+    if backend == "shared":
+        return SharedMemoryStore(
+            os.getenv("RATE_LIMIT_SHM_PATH", "/dev/shm/infra-rate-limit"),
+            slots=int(os.getenv("RATE_LIMIT_SHM_SLOTS", "262144")),
+        )
+    if backend == "redis":
+        return RedisStore(os.getenv("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0"))
+    raise ValueError(f"Unknown rate limit backend '{backend}'")
@@ -1,32 +1,57 @@
 import time
-from collections import defaultdict, deque
+from typing import Dict, Optional, Tuple
 from starlette.types import ASGIApp, Receive, Scope, Send
 from starlette.responses import JSONResponse
-from starlette.requests import Request
+from src.middlewares.rate_limit_store import InMemoryStore, RateLimitStore
+
+
+def parse_route_limits(spec: str) -> Dict[str, Tuple[int, int]]:
+    # "/users/import=2/60,/users/export=5/60" -> {"/users/import": (2, 60), ...}
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        prefix, _, limit = item.partition("=")
+        max_requests, _, period = limit.partition("/")
+        limits[prefix] = (int(max_requests), int(period))
+    return limits
 
 
 class RateLimiterMiddleware:
-    def __init__(self, app: ASGIApp, max_requests: int = 5, period: int = 60):
+    def __init__(
+        self,
+        app: ASGIApp,
+        max_requests: int = 5,
+        period: int = 60,
+        max_keys: int = 100_000,
+        route_limits: Optional[Dict[str, Tuple[int, int]]] = None,
+        store: Optional[RateLimitStore] = None,
+    ):
         self.app = app
         self.max_requests = max_requests
         self.period = period
-        self.access_log = defaultdict(deque)
+        self.default_limit = ("", max_requests, period)
+        # Path prefix -> (max_requests, period); the longest matching prefix wins.
+        self.route_limits = sorted((route_limits or {}).items(), key=lambda item: len(item[0]), reverse=True)
+        self.store = store or InMemoryStore(max_keys=max_keys)
+
+    def _limit_for(self, path: str) -> Tuple[str, int, int]:
+        for prefix, (max_requests, period) in self.route_limits:
+            if path.startswith(prefix):
+                return prefix, max_requests, period
+        return self.default_limit
+
+    async def allow(self, client: str, path: str, now: float) -> bool:
+        scope_key, max_requests, period = self._limit_for(path)
+        return await self.store.hit(f"{client}|{scope_key}", max_requests, period, now)
 
     async def __call__(self, scope: Scope, receive: Receive, send: Send):
         if scope["type"] != "http":
             await self.app(scope, receive, send)
             return
 
-        request = Request(scope, receive=receive)
-        ip = request.client.host
-        now = time.time()
-        access_times = self.access_log[ip]
-
-        # Clear old timestamps
-        while access_times and now - access_times[0] > self.period:
-            access_times.popleft()
+        client = scope.get("client")
+        ip = client[0] if client else "unknown"
 
-        if len(access_times) >= self.max_requests:
+        if not await self.allow(ip, scope["path"], time.time()):
             response = JSONResponse(
                 status_code=429,
                 content={"detail": "Rate limit exceeded. Try again in a moment."}
@@ -34,5 +59,4 @@ class RateLimiterMiddleware:
             await response(scope, receive, send)
             return
 
-        access_times.append(now)
         await self.app(scope, receive, send)
@@ -55,32 +55,265 @@ class BlockMaliciousPayloadMiddleware(BaseHTTPMiddleware):
         return await call_next(request)
 '''
 
-import json
 import re
 import logging
-from starlette.requests import Request
+from typing import Iterable, List, Optional
+from starlette.requests import ClientDisconnect, Request
 from starlette.responses import JSONResponse
-from starlette.types import ASGIApp, Receive, Scope, Send
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from src.utils import json_codec
+from src.utils.exceptions import MaliciousPayloadError, PayloadTooLargeError
+from src.utils.ndjson import LineSplitter
+from src.utils.parsed_body import PARSED_JSON_SCOPE_KEY
 
 logger = logging.getLogger("malicious-filter")
-logging.basicConfig(level=logging.INFO)
 
-malicious_patterns = [
-    re.compile(r"<script", re.IGNORECASE),
-    re.compile(r"href\s*=\s*['\"]javascript:", re.IGNORECASE),
-    re.compile(r"src\s*=\s*['\"]javascript:", re.IGNORECASE),
-    re.compile(r"\bon[a-zA-Z]{2,}\s*=", re.IGNORECASE),
-    re.compile(r"\bOR\s+1\s*=\s*1\b", re.IGNORECASE),
-    re.compile(r"\bDROP\s+TABLE\b", re.IGNORECASE),
-    re.compile(r"\bUNION\s+SELECT\b", re.IGNORECASE),
-    re.compile(r"<iframe", re.IGNORECASE),
-    re.compile(r"eval\s*\(", re.IGNORECASE),
+DEFAULT_PATTERNS = [
+    r"<script",
+    r"href\s*=\s*['\"]javascript:",
+    r"src\s*=\s*['\"]javascript:",
+    r"\bon[a-zA-Z]{2,}\s*=",
+    r"\bOR\s+1\s*=\s*1\b",
+    r"\bDROP\s+TABLE\b",
+    r"\bUNION\s+SELECT\b",
+    r"<iframe",
+    r"eval\s*\(",
 ]
 
+malicious_patterns = [re.compile(pattern, re.IGNORECASE) for pattern in DEFAULT_PATTERNS]
+
+
+def load_patterns(path: str) -> List[str]:
+    # One regex per line; blank lines and lines starting with '#' are ignored.
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+# Escapes that match a class or a position, never a specific character.
+_CLASS_ESCAPES = frozenset("bBdDsSwWAZ")
+
+
+def _required_literals(pattern: str) -> List[str]:
+    # Literal runs that every match of `pattern` must contain, casefolded. Patterns
+    # with groups, alternation or character escapes (\x3c, \u..., \n, \1) are not
+    # analysed and get no literals.
+    runs, run, i = [], "", 0
+    while i < len(pattern):
+        ch = pattern[i]
+        i += 1
+        if ch in "(|":
+            return []
+        if ch == "[":
+            # A leading "]", also after "^", is a member rather than the end.
+            if pattern[i:i + 1] == "^":
+                i += 1
+            if pattern[i:i + 1] == "]":
+                i += 1
+            while i < len(pattern) and pattern[i] != "]":
+                i += 2 if pattern[i] == "\\" else 1
+            i += 1
+            literal = None
+        elif ch == "\\":
+            ch = pattern[i:i + 1]
+            i += 1
+            if ch in _CLASS_ESCAPES:
+                literal = None
+            elif ch.isalnum() or not ch.isascii():
+                return []
+            else:
+                literal = ch
+        elif ch in ".^$":
+            literal = None
+        else:
+            literal = ch
+        quantifier = pattern[i:i + 1]
+        if quantifier and quantifier in "*+?{":
+            i = (pattern.find("}", i) + 1 or len(pattern)) if quantifier == "{" else i + 1
+            if pattern[i:i + 1] in ("?", "+"):
+                i += 1
+            if quantifier == "+" and literal is not None:
+                run += literal
+            literal = None
+        if literal is None:
+            runs.append(run)
+            run = ""
+        else:
+            run += literal
+    runs.append(run)
+    return sorted({r.casefold() for r in runs if r}, key=len, reverse=True)
+
+
+class PayloadScanner:
+    # Each string is casefolded once and checked for the literals each pattern
+    # requires with plain substring tests; a regex only runs when all of its
+    # literals are present, so clean text rarely reaches the regex engine.
+    def __init__(self, patterns: Iterable[str] = DEFAULT_PATTERNS, max_depth: int = 5):
+        self.max_depth = max_depth
+        self.rules = []
+        self.raw_rules = []
+        for pattern in patterns:
+            literals = _required_literals(pattern)
+            self.rules.append((re.compile(pattern, re.IGNORECASE), literals))
+            # Byte patterns only fold ASCII case, so only ASCII literals gate them.
+            self.raw_rules.append((
+                re.compile(pattern.encode("utf-8"), re.IGNORECASE),
+                [literal.encode("ascii") for literal in literals if literal.isascii()],
+            ))
+
+    @staticmethod
+    def _match(rules, value, folded) -> bool:
+        for regex, literals in rules:
+            for literal in literals:
+                if literal not in folded:
+                    break
+            else:
+                if regex.search(value):
+                    return True
+        return False
+
+    def search(self, value: str) -> bool:
+        return self._match(self.rules, value, value.casefold())
+
+    def contains_malicious(self, value) -> bool:
+        stack = [(value, 0)]
+        while stack:
+            value, depth = stack.pop()
+            if isinstance(value, str):
+                if self.search(value):
+                    return True
+            elif depth < self.max_depth:
+                if isinstance(value, dict):
+                    stack.extend((v, depth + 1) for v in value.values())
+                elif isinstance(value, list):
+                    stack.extend((v, depth + 1) for v in value)
+        return False
+
+    def raw_verdict(self, body: bytes) -> Optional[bool]:
+        # True/False when the raw bytes settle it, None when the body must be decoded:
+        # JSON escapes (\u003c, \/) can hide a pattern from a byte-level scan, and
+        # byte patterns miss Unicode case variants such as "<\u017fcript".
+        if self._match(self.raw_rules, body, body.lower()):
+            return True
+        if b"\\" in body or not body.isascii():
+            return None
+        return False
+
+
+# Line-delimited bodies to `streaming_paths` are scanned as they stream instead
+# of being buffered.
+STREAMING_CONTENT_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+
 class BlockMaliciousPayloadMiddleware:
-    def __init__(self, app: ASGIApp, max_depth: int = 5):
+    def __init__(
+        self,
+        app: ASGIApp,
+        max_depth: int = 5,
+        patterns: Optional[Iterable[str]] = None,
+        scan_raw_body: bool = False,
+        max_body_size: int = 2 * 1024 * 1024,
+        streaming_paths: Iterable[str] = ("/users/import",),
+        max_line_size: int = 64 * 1024,
+        max_stream_size: int = 100 * 1024 * 1024,
+    ):
         self.app = app
         self.max_depth = max_depth
+        self.max_body_size = max_body_size
+        self.streaming_paths = frozenset(streaming_paths)
+        self.max_line_size = max_line_size
+        self.max_stream_size = max_stream_size
+        self.scanner = PayloadScanner(patterns or DEFAULT_PATTERNS, max_depth=max_depth)
+        # Raw mode scans the undecoded bytes first and skips json.loads for clean
+        # bodies without escapes. It is stricter: keys and values nested deeper
+        # than max_depth are matched too.
+        self.scan_raw_body = scan_raw_body
+
+    def contains_malicious(self, value) -> bool:
+        return self.scanner.contains_malicious(value)
+
+    def _line_is_malicious(self, line: bytes) -> bool:
+        if not line.strip():
+            return False
+        # Clean ASCII lines without escapes are settled on the raw bytes, so the
+        # route's parse is the only decode they get.
+        verdict = self.scanner.raw_verdict(line)
+        if verdict is not None:
+            return verdict
+        try:
+            return self.contains_malicious(json_codec.loads(line))
+        except ValueError:
+            # Malformed lines are reported by the endpoint that parses them.
+            return False
+
+    async def _read_body(self, receive: Receive) -> Optional[bytes]:
+        # Returns None as soon as the body grows past max_body_size.
+        chunks, size = [], 0
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                raise ClientDisconnect()
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > self.max_body_size:
+                return None
+            chunks.append(chunk)
+            if not message.get("more_body", False):
+                break
+        return b"".join(chunks)
+
+    async def _too_large(self, scope: Scope, receive: Receive, send: Send, detail: Optional[str] = None) -> None:
+        logger.warning("Rejected oversized request body to %s", scope.get("path"))
+        response = JSONResponse(
+            status_code=413,
+            content={"detail": detail or f"Request body exceeds {self.max_body_size} bytes."}
+        )
+        await response(scope, receive, send)
+
+    async def _reject(self, scope: Scope, receive: Receive, send: Send) -> None:
+        logger.warning("Blocked malicious request to %s", scope.get("path"))
+        response = JSONResponse(
+            status_code=400,
+            content={"detail": "Request blocked due to suspected malicious content."}
+        )
+        await response(scope, receive, send)
+
+    async def _scan_streaming(self, scope: Scope, receive: Receive, send: Send) -> None:
+        splitter = LineSplitter(self.max_line_size)
+        received = 0
+        response_started = False
+
+        async def scanning_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] != "http.request":
+                return message
+            body = message.get("body", b"")
+            received += len(body)
+            if received > self.max_stream_size:
+                raise PayloadTooLargeError(f"Request body exceeds {self.max_stream_size} bytes.")
+            lines = splitter.feed(body)
+            if not message.get("more_body", False):
+                lines += splitter.finish()
+            if any(self._line_is_malicious(line) for line in lines):
+                raise MaliciousPayloadError()
+            return message
+
+        async def tracking_send(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, scanning_receive, tracking_send)
+        except MaliciousPayloadError:
+            if response_started:
+                raise
+            await self._reject(scope, receive, send)
+        except PayloadTooLargeError as e:
+            if response_started:
+                raise
+            await self._too_large(scope, receive, send, e.message)
 
     async def __call__(self, scope: Scope, receive: Receive, send: Send):
         if scope["type"] != "http":
@@ -93,44 +326,50 @@ class BlockMaliciousPayloadMiddleware:
             await self.app(scope, receive, send)
             return
 
-        content_type = request.headers.get("content-type", "")
-        if "application/json" not in content_type.lower():
-            await self.app(scope, receive, send)
+        content_type = request.headers.get("content-type", "").lower()
+        content_length = request.headers.get("content-length", "")
+        if content_type.startswith(STREAMING_CONTENT_TYPES) and scope["path"] in self.streaming_paths:
+            if content_length.isdigit() and int(content_length) > self.max_stream_size:
+                await self._too_large(scope, receive, send, f"Request body exceeds {self.max_stream_size} bytes.")
+                return
+            await self._scan_streaming(scope, receive, send)
             return
 
-        body = await request.body()
-        if not body:
+        if "application/json" not in content_type:
             await self.app(scope, receive, send)
             return
 
-        try:
-            data = json.loads(body)
-        except json.JSONDecodeError:
-            await self.app(scope, receive, send)
+        if content_length.isdigit() and int(content_length) > self.max_body_size:
+            await self._too_large(scope, receive, send)
             return
 
-        def contains_malicious(value, depth=0) -> bool:
-            if depth > self.max_depth:
-                return False
-
-            if isinstance(value, str):
-                return any(pattern.search(value) for pattern in malicious_patterns)
-            elif isinstance(value, dict):
-                return any(contains_malicious(v, depth + 1) for v in value.values())
-            elif isinstance(value, list):
-                return any(contains_malicious(i, depth + 1) for i in value)
-            return False
-
-        if contains_malicious(data):
-            logger.warning("Blocked malicious request to %s", str(request.url))
-            response = JSONResponse(
-                status_code=400,
-                content={"detail": "Request blocked due to suspected malicious content."}
-            )
-            await response(scope, receive, send)
+        try:
+            body = await self._read_body(receive)
+        except ClientDisconnect:
+            return
+        if body is None:
+            await self._too_large(scope, receive, send)
             return
 
+        # The body has been consumed, so every downstream path gets it replayed.
         async def receive_with_body() -> dict:
             return {"type": "http.request", "body": body, "more_body": False}
 
+        verdict = False
+        if body:
+            verdict = self.scanner.raw_verdict(body) if self.scan_raw_body else None
+        if verdict is None:
+            try:
+                document = json_codec.loads(body)
+            except ValueError:
+                verdict = False
+            else:
+                verdict = self.contains_malicious(document)
+                # Routes built with ParsedBodyRoute pick this up instead of decoding again.
+                scope[PARSED_JSON_SCOPE_KEY] = document
+
+        if verdict:
+            await self._reject(scope, receive, send)
+            return
+
         await self.app(scope, receive_with_body, send)
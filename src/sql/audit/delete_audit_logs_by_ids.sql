@@ -0,0 +1,2 @@
+DELETE FROM audit_logs
+WHERE id IN :ids;
\ No newline at end of file
@@ -0,0 +1,5 @@
+SELECT id
+FROM audit_logs
+WHERE created_at < :cutoff
+ORDER BY created_at, id
+LIMIT :limit;
\ No newline at end of file
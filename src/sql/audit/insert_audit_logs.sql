@@ -0,0 +1,2 @@
+INSERT INTO audit_logs (event_type, event_data, created_at)
+VALUES (:event_type, :event_data, :created_at)
\ No newline at end of file
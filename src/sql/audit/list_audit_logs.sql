@@ -0,0 +1,6 @@
+SELECT id, event_type, event_data, created_at
+FROM audit_logs
+WHERE created_at >= :since
+  AND (created_at < :before_created_at OR (created_at = :before_created_at AND id < :before_id))
+ORDER BY created_at DESC, id DESC
+LIMIT :limit;
\ No newline at end of file
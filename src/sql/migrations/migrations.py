@@ -14,4 +14,32 @@ CREATE TABLE IF NOT EXISTS audit_logs (
     event_data TEXT,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
-"""
\ No newline at end of file
+"""
+
+# (created_at, id) serves time-range scans and keyset pages in that order, and
+# retention deletes; the event_type variant serves filtered listings.
+audit_logs_created_at_index = """
+CREATE INDEX idx_audit_logs_created_at_id ON audit_logs (created_at, id);
+"""
+
+audit_logs_event_type_index = """
+CREATE INDEX idx_audit_logs_event_type_created_at_id ON audit_logs (event_type, created_at, id);
+"""
+
+# Bumped by every update; user ETags and If-Match checks are built on it.
+users_version = """
+ALTER TABLE users ADD COLUMN version INT NOT NULL DEFAULT 1;
+"""
+
+# Applied in order by src.database.migrations. Never edit or reorder an entry
+# once it has shipped: add a new version instead, the checksum check will
+# refuse to start against a database where an applied migration has changed.
+# One statement per version: MySQL commits DDL implicitly, so a version whose
+# second statement failed could never be retried past its first.
+MIGRATIONS = [
+    (1, "create_users", users),
+    (2, "create_audit_logs", audit_logs),
+    (3, "add_audit_logs_created_at_index", audit_logs_created_at_index),
+    (4, "add_audit_logs_event_type_index", audit_logs_event_type_index),
+    (5, "add_users_version", users_version),
+]
@@ -0,0 +1,4 @@
+SELECT TABLE_ROWS
+FROM information_schema.TABLES
+WHERE TABLE_SCHEMA = DATABASE()
+  AND TABLE_NAME = :table_name;
\ No newline at end of file
@@ -1,2 +1,3 @@
 DELETE FROM users
-WHERE id = :user_id;
+WHERE id = :user_id
+  AND (:expected_version IS NULL OR version = :expected_version);
@@ -0,0 +1,3 @@
+SELECT id, username, email, is_active
+FROM users
+ORDER BY id;
\ No newline at end of file
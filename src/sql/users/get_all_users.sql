@@ -1,4 +1,4 @@
-SELECT id, username, email, is_active
+SELECT id, username, email, is_active, version
 FROM users
 ORDER BY id
 LIMIT :limit OFFSET :offset;
\ No newline at end of file
@@ -1,3 +1,3 @@
-SELECT id, username, email, is_active
+SELECT id, username, email, is_active, version
 FROM users
 WHERE id = :user_id;
@@ -0,0 +1,3 @@
+SELECT version
+FROM users
+WHERE id = :user_id;
\ No newline at end of file
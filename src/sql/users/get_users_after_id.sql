@@ -0,0 +1,5 @@
+SELECT id, username, email, is_active, version
+FROM users
+WHERE id > :after_id
+ORDER BY id
+LIMIT :limit;
\ No newline at end of file
@@ -0,0 +1,3 @@
+SELECT id, username, email, is_active, version
+FROM users
+WHERE email IN :emails;
\ No newline at end of file
@@ -0,0 +1,3 @@
+SELECT id, username, email, is_active, version
+FROM users
+WHERE id IN :ids;
\ No newline at end of file
@@ -1,5 +1,7 @@
 UPDATE users
 SET username = :username,
     email = :email,
-    is_active = :is_active
-WHERE id = :user_id;
\ No newline at end of file
+    is_active = :is_active,
+    version = version + 1
+WHERE id = :user_id
+  AND (:expected_version IS NULL OR version = :expected_version);
\ No newline at end of file
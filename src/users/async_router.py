@@ -0,0 +1,192 @@
+from fastapi import APIRouter, Depends, Header, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Annotated, Optional
+import os
+from dotenv import load_dotenv
+from src.database.async_core import AsyncSessionLocal
+from src.users.async_service import (
+    create_user, get_all_users, get_users_by_cursor,
+    get_user_by_id, update_user, delete_user, get_user_version
+)
+from src.users.models import UserIn, UserOut
+from src.utils.response_builder import make_response
+from src.utils.fast_json_response import FastJSONResponse
+from src.utils.response_models import GenericResponse
+from src.utils.exceptions import AppException
+from src.logger import logger
+from src.utils.paginated_response import PaginatedResponse
+from src.utils.parsed_body import ParsedBodyRoute
+from src.utils.etags import content_etag, etag_matches, if_match_version, not_modified, version_etag
+from src.utils import json_codec
+
+load_dotenv()
+IS_DEV = os.getenv("ENV", "dev") == "dev"
+
+router = APIRouter(prefix="/users", tags=["users"], route_class=ParsedBodyRoute)
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+@router.post("/", response_model=GenericResponse[UserOut], responses={409: {"description": "Conflict"}})
+async def api_create_user(data: UserIn, db: Annotated[AsyncSession, Depends(get_async_db)]):
+    logger.info("Received request to create user")
+    try:
+        user = await create_user(db, data)
+        logger.info("User created successfully: %s", user.id)
+        return FastJSONResponse(
+            status_code=201,
+            content=make_response(
+                data=user.model_dump(),
+                status=201,
+                message="User created successfully."
+            ),
+            headers={"ETag": version_etag(user.id, user.version)}
+        )
+    except AppException as e:
+        logger.warning("AppException during user creation: %s", e.message)
+        return FastJSONResponse(
+            status_code=e.status_code,
+            content=make_response(None, e.status_code, e.message)
+        )
+    except Exception as e:
+        logger.exception("Unexpected error during user creation")
+        return FastJSONResponse(
+            status_code=500,
+            content=make_response(None, 500, str(e) if IS_DEV else "Internal server error")
+        )
+
+
+@router.get("/", response_model=GenericResponse[PaginatedResponse[UserOut]], responses={304: {"description": "Not modified"}})
+async def api_get_all(
+    db: Annotated[AsyncSession, Depends(get_async_db)],
+    if_none_match: Optional[str] = Header(None),
+    page: int = Query(1, ge=1),
+    size: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(
+        None,
+        description="Keyset pagination cursor. Pass an empty value to start and "
+                    "then the returned next_cursor; page is ignored in this mode."
+    )
+):
+    logger.info("Fetching users (page=%s, size=%s, cursor=%r)", page, size, cursor)
+    try:
+        if cursor is not None:
+            paginated = await get_users_by_cursor(db, cursor, size)
+        else:
+            paginated = await get_all_users(db, page, size)
+        body = json_codec.dumps(make_response(
+            data=paginated.model_dump(),
+            status=200,
+            message="Users fetched successfully."
+        ))
+        etag = content_etag(body)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        return Response(content=body, status_code=200, media_type="application/json", headers={"ETag": etag})
+    except AppException as e:
+        logger.warning("AppException during get_all_users: %s", e.message)
+        return FastJSONResponse(
+            status_code=e.status_code,
+            content=make_response(None, e.status_code, e.message)
+        )
+    except Exception as e:
+        logger.exception("Unexpected error during get_all_users")
+        return FastJSONResponse(
+            status_code=500,
+            content=make_response(None, 500, str(e))
+        )
+
+
+@router.get("/{user_id:int}", response_model=GenericResponse[UserOut], responses={304: {"description": "Not modified"}})
+async def api_get_one(
+    user_id: int, db: Annotated[AsyncSession, Depends(get_async_db)], if_none_match: Optional[str] = Header(None)
+):
+    logger.info("Fetching user with ID: %s", user_id)
+    try:
+        version = None
+        if if_none_match:
+            version = await get_user_version(db, user_id)
+            if version is not None and etag_matches(if_none_match, version_etag(user_id, version)):
+                return not_modified(version_etag(user_id, version))
+        user = await get_user_by_id(db, user_id, version)
+        logger.info("Fetched user: %s", user.id)
+        return FastJSONResponse(
+            status_code=200,
+            content=make_response(
+                data=user.model_dump(),
+                status=200,
+                message="User fetched successfully."
+            ),
+            headers={"ETag": version_etag(user.id, user.version)}
+        )
+    except AppException as e:
+        logger.warning("AppException during get_user_by_id: %s", e.message)
+        return FastJSONResponse(
+            status_code=e.status_code,
+            content=make_response(None, e.status_code, e.message)
+        )
+    except Exception as e:
+        logger.exception("Unexpected error during get_user_by_id")
+        return FastJSONResponse(
+            status_code=500,
+            content=make_response(None, 500, str(e) if IS_DEV else "Internal server error")
+        )
+
+
+@router.put("/{user_id:int}", response_model=GenericResponse[UserOut], responses={412: {"description": "Precondition failed"}})
+async def api_update_user(
+    user_id: int, data: UserIn, db: Annotated[AsyncSession, Depends(get_async_db)], if_match: Optional[str] = Header(None)
+):
+    logger.info("Updating user with ID: %s", user_id)
+    try:
+        user = await update_user(db, user_id, data, if_match_version(if_match, user_id))
+        logger.info("User updated successfully: %s", user.id)
+        return FastJSONResponse(
+            status_code=200,
+            content=make_response(
+                data=user.model_dump(),
+                status=200,
+                message="User updated successfully."
+            ),
+            headers={"ETag": version_etag(user.id, user.version)}
+        )
+    except AppException as e:
+        logger.warning("AppException during update_user: %s", e.message)
+        return FastJSONResponse(
+            status_code=e.status_code,
+            content=make_response(None, e.status_code, e.message)
+        )
+    except Exception as e:
+        logger.exception("Unexpected error during update_user")
+        return FastJSONResponse(
+            status_code=500,
+            content=make_response(None, 500, str(e) if IS_DEV else "Internal server error")
+        )
+
+
+@router.delete("/{user_id:int}", response_model=GenericResponse[None], responses={412: {"description": "Precondition failed"}})
+async def api_delete_user(
+    user_id: int, db: Annotated[AsyncSession, Depends(get_async_db)], if_match: Optional[str] = Header(None)
+):
+    logger.info("Deleting user with ID: %s", user_id)
+    try:
+        await delete_user(db, user_id, if_match_version(if_match, user_id))
+        logger.info("User deleted: %s", user_id)
+        return FastJSONResponse(
+            status_code=200,
+            content=make_response(None, 200, "User deleted successfully.")
+        )
+    except AppException as e:
+        logger.warning("AppException during delete_user: %s", e.message)
+        return FastJSONResponse(
+            status_code=e.status_code,
+            content=make_response(None, e.status_code, e.message)
+        )
+    except Exception as e:
+        logger.exception("Unexpected error during delete_user")
+        return FastJSONResponse(
+            status_code=500,
+            content=make_response(None, 500, str(e) if IS_DEV else "Internal server error")
+        )
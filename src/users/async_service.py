@@ -0,0 +1,164 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import SQLAlchemyError
+from src.database.replicas import reads_from_replica
+from src.database.sql_registry import sql_registry
+from src.users.models import UserIn, UserOut
+from src.users.cache import user_cache
+from src.audit.writer import audit_writer
+from src.utils.db_error_parser import handle_sql_error
+from src.utils.exceptions import AppException
+from src.logger import logger
+from src.utils.pagination import paginate_raw_query_async, paginate_keyset_query_async
+from src.utils.paginated_response import PaginatedResponse
+from src.users.service import users_count_strategy
+
+sql_registry.require(
+    "users/create_user", "users/get_all_users", "users/count_users",
+    "users/get_user_by_id", "users/update_user", "users/delete_user",
+    "users/get_users_after_id", "users/get_user_version",
+)
+
+
+async def create_user(session: AsyncSession, data: UserIn) -> UserOut:
+    logger.debug("Creating user with data: %s", data)
+    try:
+        stmt = sql_registry.get("users/create_user")
+        result = await session.execute(stmt, data.model_dump())
+        user_id = result.lastrowid
+        await session.commit()
+        users_count_strategy.invalidate()
+        user = UserOut(id=user_id, **data.model_dump())
+        user_cache.set(user)
+        audit_writer.record("user.created", user.model_dump())
+        logger.info("User created with ID: %s", user_id)
+        return user
+    except SQLAlchemyError as e:
+        await session.rollback()
+        logger.exception("Database error during user creation")
+        handle_sql_error(e, entity="User")
+
+
+@reads_from_replica
+async def get_all_users(session: AsyncSession, page: int, size: int) -> PaginatedResponse[UserOut]:
+    logger.debug("Getting paginated users - page: %s, size: %s", page, size)
+    try:
+        paginated = await paginate_raw_query_async(
+            session=session,
+            data_sql=sql_registry.get("users/get_all_users"),
+            count_sql=sql_registry.get("users/count_users"),
+            model=UserOut,
+            page=page,
+            size=size,
+            count_strategy=users_count_strategy
+        )
+
+        logger.info("Retrieved %s users out of %s", len(paginated.data), paginated.total)
+        return paginated
+
+    except SQLAlchemyError as e:
+        logger.exception("Database error during get_all_users")
+        handle_sql_error(e, entity="User")
+
+
+@reads_from_replica
+async def get_users_by_cursor(session: AsyncSession, cursor: str | None, size: int) -> PaginatedResponse[UserOut]:
+    logger.debug("Getting users by cursor - cursor: %s, size: %s", cursor, size)
+    try:
+        paginated = await paginate_keyset_query_async(
+            session=session,
+            data_sql=sql_registry.get("users/get_users_after_id"),
+            model=UserOut,
+            size=size,
+            cursor=cursor
+        )
+
+        logger.info("Retrieved %s users after cursor", len(paginated.data))
+        return paginated
+
+    except SQLAlchemyError as e:
+        logger.exception("Database error during get_users_by_cursor")
+        handle_sql_error(e, entity="User")
+
+
+@reads_from_replica
+async def get_user_by_id(session: AsyncSession, user_id: int, version: int | None = None) -> UserOut:
+    logger.debug("Getting user by ID: %s", user_id)
+    cached = user_cache.get(user_id)
+    if cached is not None and (version is None or cached.version == version):
+        return cached
+    try:
+        stmt = sql_registry.get("users/get_user_by_id")
+        row = (await session.execute(stmt, {"user_id": user_id})).first()
+        if not row:
+            raise AppException(f"User with ID {user_id} not found", 404, safe_to_show=True)
+        user = UserOut(**row._mapping)
+        user_cache.set(user)
+        logger.info("User found: %s", user.id)
+        return user
+    except SQLAlchemyError as e:
+        logger.exception("Database error during get_user_by_id")
+        handle_sql_error(e, entity="User")
+
+
+async def _missing_or_changed(session: AsyncSession, user_id: int, expected_version: int | None) -> AppException:
+    if expected_version is not None:
+        row = (await session.execute(sql_registry.get("users/get_user_version"), {"user_id": user_id})).first()
+        if row is not None:
+            return AppException("Precondition failed: the resource has changed.", 412, safe_to_show=True)
+    return AppException(f"User with ID {user_id} not found", 404, safe_to_show=True)
+
+
+@reads_from_replica
+async def get_user_version(session: AsyncSession, user_id: int) -> int | None:
+    try:
+        row = (await session.execute(sql_registry.get("users/get_user_version"), {"user_id": user_id})).first()
+        return row.version if row else None
+    except SQLAlchemyError as e:
+        logger.exception("Database error during get_user_version")
+        handle_sql_error(e, entity="User")
+
+
+async def update_user(session: AsyncSession, user_id: int, data: UserIn, expected_version: int | None = None) -> UserOut:
+    logger.debug("Updating user ID %s with data: %s", user_id, data)
+    try:
+        params = data.model_dump(); params["user_id"] = user_id; params["expected_version"] = expected_version
+        stmt = sql_registry.get("users/update_user")
+        result = await session.execute(stmt, params)
+        if result.rowcount == 0:
+            error = await _missing_or_changed(session, user_id, expected_version)
+            await session.rollback()
+            user_cache.invalidate(user_id)
+            raise error
+        row = (await session.execute(sql_registry.get("users/get_user_by_id"), {"user_id": user_id})).first()
+        await session.commit()
+        user_cache.invalidate(user_id)
+        user = UserOut(**row._mapping)
+        user_cache.set(user)
+        audit_writer.record("user.updated", user.model_dump())
+        logger.info("User updated with ID: %s", user_id)
+        return user
+    except SQLAlchemyError as e:
+        await session.rollback()
+        logger.exception("Database error during update_user")
+        handle_sql_error(e, entity="User")
+
+
+async def delete_user(session: AsyncSession, user_id: int, expected_version: int | None = None) -> None:
+    logger.debug("Deleting user with ID: %s", user_id)
+    try:
+        stmt = sql_registry.get("users/delete_user")
+        result = await session.execute(stmt, {"user_id": user_id, "expected_version": expected_version})
+        if result.rowcount == 0:
+            error = await _missing_or_changed(session, user_id, expected_version)
+            await session.rollback()
+            user_cache.invalidate(user_id)
+            raise error
+        await session.commit()
+        user_cache.invalidate(user_id)
+        users_count_strategy.invalidate()
+        audit_writer.record("user.deleted", {"id": user_id})
+        logger.info("User deleted: %s", user_id)
+    except SQLAlchemyError as e:
+        await session.rollback()
+        logger.exception("Database error during delete_user")
+        handle_sql_error(e, entity="User")
@@ -0,0 +1,52 @@
+import os
+import sys
+from typing import Optional
+from dotenv import load_dotenv
+from src.users.models import UserOut
+from src.utils.cache import CacheBackend, LRUCache
+
+load_dotenv()
+
+
+def _entry_size(data: dict) -> int:
+    return sys.getsizeof(data) + sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in data.items())
+
+
+class UserCache:
+    # Entries are stored as plain dicts so a shared backend can serialize them as-is.
+    def __init__(self, backend: CacheBackend, enabled: bool = True):
+        self.backend = backend
+        self.enabled = enabled
+
+    @staticmethod
+    def _key(user_id: int) -> str:
+        return f"user:{user_id}"
+
+    def get(self, user_id: int) -> Optional[UserOut]:
+        if not self.enabled:
+            return None
+        data = self.backend.get(self._key(user_id))
+        return UserOut.model_construct(**data) if data is not None else None
+
+    def set(self, user: UserOut) -> None:
+        if self.enabled:
+            self.backend.set(self._key(user.id), user.model_dump())
+
+    def invalidate(self, user_id: int) -> None:
+        self.backend.delete(self._key(user_id))
+
+    def stats(self) -> dict:
+        return {"enabled": self.enabled, **self.backend.stats()}
+
+
+# Per process: a write through another worker only shows up here once the entry
+# expires (USER_CACHE_TTL), so conditional requests read versions from the database.
+user_cache = UserCache(
+    LRUCache(
+        max_entries=int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000")),
+        max_bytes=int(os.getenv("USER_CACHE_MAX_BYTES", str(16 * 1024 * 1024))),
+        ttl=float(os.getenv("USER_CACHE_TTL", "60")),
+        sizeof=_entry_size,
+    ),
+    enabled=os.getenv("USER_CACHE_ENABLED", "true").lower() in ("1", "true", "yes"),
+)
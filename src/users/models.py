@@ -1,3 +1,4 @@
+from typing import List, Optional
 from pydantic import field_validator
 from src.utils.strict_json_model import StrictBaseModel
 
@@ -8,3 +9,35 @@ class UserIn(StrictBaseModel):
 
 class UserOut(UserIn):
     id: int
+    version: int = 1
+
+class BulkUserResult(StrictBaseModel):
+    index: int
+    status: int
+    message: str
+    data: Optional[UserOut] = None
+
+class BulkCreateResponse(StrictBaseModel):
+    created: int
+    failed: int
+    results: List[BulkUserResult]
+
+class UserLookupIn(StrictBaseModel):
+    ids: List[int]
+
+class UserLookupResponse(StrictBaseModel):
+    users: List[UserOut]
+    missing: List[int]
+
+class ImportLineError(StrictBaseModel):
+    line: int
+    status: int
+    message: str
+
+class ImportSummary(StrictBaseModel):
+    lines: int
+    created: int
+    failed: int
+    errors: List[ImportLineError]
+    errors_truncated: bool = False
+    aborted: Optional[str] = None
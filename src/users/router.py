@@ -1,25 +1,47 @@
-from fastapi import APIRouter, Depends, Query
-from fastapi.responses import JSONResponse
+import csv
+import io
+import itertools
+import json
+from fastapi import APIRouter, Depends, Header, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import Annotated
+from typing import Annotated, Iterator, Literal, Optional
 import os
 from dotenv import load_dotenv
 from src.database.core import SessionLocal
 from src.users.service import (
-    create_user, get_all_users,
-    get_user_by_id, update_user, delete_user
+    create_user, create_users_bulk, get_all_users, get_users_by_cursor,
+    get_user_by_id, get_users_by_ids, update_user, delete_user, stream_users,
+    insert_users, get_user_version
+)
+from src.users.models import (
+    UserIn, UserOut, BulkCreateResponse, UserLookupIn, UserLookupResponse,
+    ImportLineError, ImportSummary
 )
-from src.users.models import UserIn, UserOut
 from src.utils.response_builder import make_response
+from src.utils.fast_json_response import FastJSONResponse
 from src.utils.response_models import GenericResponse
-from src.utils.exceptions import AppException
+from src.utils.exceptions import AppException, MaliciousPayloadError
 from src.logger import logger
+from src.middlewares.sanitization import STREAMING_CONTENT_TYPES
 from src.utils.paginated_response import PaginatedResponse
+from src.utils.parsed_body import ParsedBodyRoute
+from src.utils.etags import content_etag, etag_matches, if_match_version, not_modified, version_etag
+from src.utils import json_codec
+from src.utils.ndjson import LineSplitter
 
 load_dotenv()
 IS_DEV = os.getenv("ENV", "dev") == "dev"
 
-router = APIRouter(prefix="/users", tags=["users"])
+router = APIRouter(prefix="/users", tags=["users"], route_class=ParsedBodyRoute)
+
+EXPORT_FIELDS = ["id", "username", "email", "is_active"]
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "500"))
+IMPORT_MAX_LINE_BYTES = int(os.getenv("IMPORT_MAX_LINE_BYTES", str(64 * 1024)))
+IMPORT_MAX_REPORTED_ERRORS = int(os.getenv("IMPORT_MAX_REPORTED_ERRORS", "1000"))
 
 def get_db():
     db = SessionLocal()
@@ -34,135 +56,350 @@ def api_create_user(data: UserIn, db: Annotated[Session, Depends(get_db)]):
     logger.info("Received request to create user")
     try:
         user = create_user(db, data)
-        logger.info(f"User created successfully: {user.id}")
-        return JSONResponse(
+        logger.info("User created successfully: %s", user.id)
+        return FastJSONResponse(
             status_code=201,
             content=make_response(
                 data=user.model_dump(),
                 status=201,
                 message="User created successfully."
-            )
+            ),
+            headers={"ETag": version_etag(user.id, user.version)}
         )
     except AppException as e:
-        logger.warning(f"AppException during user creation: {e.message}")
-        return JSONResponse(
+        logger.warning("AppException during user creation: %s", e.message)
+        return FastJSONResponse(
             status_code=e.status_code,
             content=make_response(None, e.status_code, e.message)
         )
     except Exception as e:
         logger.exception("Unexpected error during user creation")
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=500,
             content=make_response(None, 500, str(e) if IS_DEV else "Internal server error")
         )
 
 
-@router.get("/", response_model=GenericResponse[PaginatedResponse[UserOut]])
-def api_get_all(
-    db: Annotated[Session, Depends(get_db)],
-    page: int = Query(1, ge=1),
-    size: int = Query(10, ge=1, le=100)
-):
-    logger.info(f"Fetching users (page={page}, size={size})")
+@router.post("/bulk", response_model=GenericResponse[BulkCreateResponse], responses={207: {"description": "Partial success"}})
+def api_create_users_bulk(data: list[UserIn], db: Annotated[Session, Depends(get_db)]):
+    logger.info("Received request to bulk create %s users", len(data))
+    try:
+        result = create_users_bulk(db, data)
+        status_code = 201 if result.failed == 0 else 207
+        return FastJSONResponse(
+            status_code=status_code,
+            content=make_response(
+                data=result.model_dump(),
+                status=status_code,
+                message=f"Created {result.created} of {len(data)} users."
+            )
+        )
+    except AppException as e:
+        logger.warning("AppException during bulk user creation: %s", e.message)
+        return FastJSONResponse(
+            status_code=e.status_code,
+            content=make_response(None, e.status_code, e.message)
+        )
+    except Exception as e:
+        logger.exception("Unexpected error during bulk user creation")
+        return FastJSONResponse(
+            status_code=500,
+            content=make_response(None, 500, str(e) if IS_DEV else "Internal server error")
+        )
+
+@router.post("/lookup", response_model=GenericResponse[UserLookupResponse])
+def api_lookup_users(data: UserLookupIn, db: Annotated[Session, Depends(get_db)]):
+    logger.info("Looking up %s users", len(data.ids))
     try:
-        paginated = get_all_users(db, page, size)
-        return JSONResponse(
+        result = get_users_by_ids(db, data.ids)
+        return FastJSONResponse(
             status_code=200,
             content=make_response(
-                data=paginated.model_dump(),
+                data=result.model_dump(),
                 status=200,
                 message="Users fetched successfully."
             )
         )
     except AppException as e:
-        logger.warning(f"AppException during get_all_users: {e.message}")
-        return JSONResponse(
+        logger.warning("AppException during get_users_by_ids: %s", e.message)
+        return FastJSONResponse(
+            status_code=e.status_code,
+            content=make_response(None, e.status_code, e.message)
+        )
+    except Exception as e:
+        logger.exception("Unexpected error during get_users_by_ids")
+        return FastJSONResponse(
+            status_code=500,
+            content=make_response(None, 500, str(e) if IS_DEV else "Internal server error")
+        )
+
+class _ImportState:
+    def __init__(self):
+        self.summary = ImportSummary(lines=0, created=0, failed=0, errors=[])
+        self.batch: list[tuple[int, UserIn]] = []
+        self.line_no = 0
+
+    def fail(self, line: int, status: int, message: str) -> None:
+        self.summary.failed += 1
+        if len(self.summary.errors) < IMPORT_MAX_REPORTED_ERRORS:
+            self.summary.errors.append(ImportLineError(line=line, status=status, message=message))
+        else:
+            self.summary.errors_truncated = True
+
+    def parse(self, raw: bytes) -> None:
+        self.line_no += 1
+        line = self.line_no
+        if not raw.strip():
+            return
+        self.summary.lines += 1
+        try:
+            self.batch.append((line, UserIn.model_validate(json.loads(raw))))
+        except ValueError as e:
+            if isinstance(e, ValidationError):
+                message = e.errors()[0].get("msg", "Validation error.")
+            else:
+                message = "Invalid JSON."
+            self.fail(line, 422, message)
+
+    async def flush(self, db: Session) -> None:
+        if not self.batch:
+            return
+        batch, self.batch = self.batch, []
+        # Awaiting the insert before reading more of the body is the backpressure:
+        # the client's upload stalls while the database catches up.
+        results = await run_in_threadpool(insert_users, db, [user for _, user in batch])
+        for (line, _), result in zip(batch, results):
+            if result.status == 201:
+                self.summary.created += 1
+            else:
+                self.fail(line, result.status, result.message)
+
+
+@router.post("/import", response_model=GenericResponse[ImportSummary])
+async def api_import_users(request: Request, db: Annotated[Session, Depends(get_db)]):
+    content_type = request.headers.get("content-type", "").lower()
+    if not content_type.startswith(STREAMING_CONTENT_TYPES):
+        return FastJSONResponse(
+            status_code=415,
+            content=make_response(None, 415, "Imports must be sent as application/x-ndjson.")
+        )
+
+    logger.info("Starting streaming user import")
+    state = _ImportState()
+    splitter = LineSplitter(IMPORT_MAX_LINE_BYTES)
+    try:
+        async for chunk in request.stream():
+            for raw in splitter.feed(chunk):
+                state.parse(raw)
+                if len(state.batch) >= IMPORT_BATCH_SIZE:
+                    await state.flush(db)
+        for raw in splitter.finish():
+            state.parse(raw)
+        await state.flush(db)
+    except MaliciousPayloadError as e:
+        # Batches flushed before the offending line are already committed.
+        logger.warning("Import aborted after %s lines: %s", state.summary.lines, e.message)
+        state.summary.aborted = e.message
+        return FastJSONResponse(
+            status_code=e.status_code,
+            content=make_response(state.summary.model_dump(), e.status_code, e.message)
+        )
+    except AppException as e:
+        logger.warning("AppException during user import: %s", e.message)
+        state.summary.aborted = e.message
+        return FastJSONResponse(
+            status_code=e.status_code,
+            content=make_response(state.summary.model_dump(), e.status_code, e.message)
+        )
+    except Exception as e:
+        logger.exception("Unexpected error during user import")
+        return FastJSONResponse(
+            status_code=500,
+            content=make_response(None, 500, str(e) if IS_DEV else "Internal server error")
+        )
+
+    summary = state.summary
+    logger.info("Import finished: %s created, %s failed out of %s lines", summary.created, summary.failed, summary.lines)
+    return FastJSONResponse(
+        status_code=200,
+        content=make_response(
+            data=summary.model_dump(),
+            status=200,
+            message=f"Imported {summary.created} of {summary.lines} users."
+        )
+    )
+
+@router.get("/", response_model=GenericResponse[PaginatedResponse[UserOut]], responses={304: {"description": "Not modified"}})
+def api_get_all(
+    db: Annotated[Session, Depends(get_db)],
+    if_none_match: Optional[str] = Header(None),
+    page: int = Query(1, ge=1),
+    size: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(
+        None,
+        description="Keyset pagination cursor. Pass an empty value to start and "
+                    "then the returned next_cursor; page is ignored in this mode."
+    )
+):
+    logger.info("Fetching users (page=%s, size=%s, cursor=%r)", page, size, cursor)
+    try:
+        if cursor is not None:
+            paginated = get_users_by_cursor(db, cursor, size)
+        else:
+            paginated = get_all_users(db, page, size)
+        # A page has no single version, so its ETag hashes the encoded body:
+        # the query still runs, but an unchanged page is not sent again.
+        body = json_codec.dumps(make_response(
+            data=paginated.model_dump(),
+            status=200,
+            message="Users fetched successfully."
+        ))
+        etag = content_etag(body)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        return Response(content=body, status_code=200, media_type="application/json", headers={"ETag": etag})
+    except AppException as e:
+        logger.warning("AppException during get_all_users: %s", e.message)
+        return FastJSONResponse(
             status_code=e.status_code,
             content=make_response(None, e.status_code, e.message)
         )
     except Exception as e:
         logger.exception("Unexpected error during get_all_users")
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=500,
             content=make_response(None, 500, str(e))
         )
 
 
-@router.get("/{user_id}", response_model=GenericResponse[UserOut])
-def api_get_one(user_id: int, db: Annotated[Session, Depends(get_db)]):
-    logger.info(f"Fetching user with ID: {user_id}")
+def _ndjson_chunks(chunks: Iterator[list[dict]]) -> Iterator[str]:
+    for rows in chunks:
+        yield "".join(json.dumps(row, separators=(",", ":")) + "\n" for row in rows)
+
+
+def _csv_chunks(chunks: Iterator[list[dict]]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+    writer.writeheader()
+    for rows in chunks:
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+@router.get("/export", responses={200: {"content": {"application/x-ndjson": {}, "text/csv": {}}}})
+def api_export_users(format: Literal["ndjson", "csv"] = Query("ndjson")):
+    logger.info("Exporting users as %s", format)
+    try:
+        chunks = stream_users()
+        # Pull the first chunk here so connection/query errors still produce a
+        # proper error response instead of a truncated 200 stream.
+        first = next(chunks, [])
+        chunks = itertools.chain([first], chunks)
+        body = _csv_chunks(chunks) if format == "csv" else _ndjson_chunks(chunks)
+        return StreamingResponse(
+            body,
+            media_type=EXPORT_MEDIA_TYPES[format],
+            headers={"Content-Disposition": f'attachment; filename="users.{format}"'}
+        )
+    except AppException as e:
+        logger.warning("AppException during export_users: %s", e.message)
+        return FastJSONResponse(
+            status_code=e.status_code,
+            content=make_response(None, e.status_code, e.message)
+        )
+    except Exception as e:
+        logger.exception("Unexpected error during export_users")
+        return FastJSONResponse(
+            status_code=500,
+            content=make_response(None, 500, str(e) if IS_DEV else "Internal server error")
+        )
+
+@router.get("/{user_id}", response_model=GenericResponse[UserOut], responses={304: {"description": "Not modified"}})
+def api_get_one(user_id: int, db: Annotated[Session, Depends(get_db)], if_none_match: Optional[str] = Header(None)):
+    logger.info("Fetching user with ID: %s", user_id)
     try:
-        user = get_user_by_id(db, user_id)
-        logger.info(f"Fetched user: {user.id}")
-        return JSONResponse(
+        version = None
+        if if_none_match:
+            version = get_user_version(db, user_id)
+            if version is not None and etag_matches(if_none_match, version_etag(user_id, version)):
+                return not_modified(version_etag(user_id, version))
+        user = get_user_by_id(db, user_id, version)
+        logger.info("Fetched user: %s", user.id)
+        return FastJSONResponse(
             status_code=200,
             content=make_response(
                 data=user.model_dump(),
                 status=200,
                 message="User fetched successfully."
-            )
+            ),
+            headers={"ETag": version_etag(user.id, user.version)}
         )
     except AppException as e:
-        logger.warning(f"AppException during get_user_by_id: {e.message}")
-        return JSONResponse(
+        logger.warning("AppException during get_user_by_id: %s", e.message)
+        return FastJSONResponse(
             status_code=e.status_code,
             content=make_response(None, e.status_code, e.message)
         )
     except Exception as e:
         logger.exception("Unexpected error during get_user_by_id")
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=500,
             content=make_response(None, 500, str(e) if IS_DEV else "Internal server error")
         )
 
 
-@router.put("/{user_id}", response_model=GenericResponse[UserOut])
-def api_update_user(user_id: int, data: UserIn, db: Annotated[Session, Depends(get_db)]):
-    logger.info(f"Updating user with ID: {user_id}")
+@router.put("/{user_id}", response_model=GenericResponse[UserOut], responses={412: {"description": "Precondition failed"}})
+def api_update_user(
+    user_id: int, data: UserIn, db: Annotated[Session, Depends(get_db)], if_match: Optional[str] = Header(None)
+):
+    logger.info("Updating user with ID: %s", user_id)
     try:
-        user = update_user(db, user_id, data)
-        logger.info(f"User updated successfully: {user.id}")
-        return JSONResponse(
+        user = update_user(db, user_id, data, if_match_version(if_match, user_id))
+        logger.info("User updated successfully: %s", user.id)
+        return FastJSONResponse(
             status_code=200,
             content=make_response(
                 data=user.model_dump(),
                 status=200,
                 message="User updated successfully."
-            )
+            ),
+            headers={"ETag": version_etag(user.id, user.version)}
         )
     except AppException as e:
-        logger.warning(f"AppException during update_user: {e.message}")
-        return JSONResponse(
+        logger.warning("AppException during update_user: %s", e.message)
+        return FastJSONResponse(
             status_code=e.status_code,
             content=make_response(None, e.status_code, e.message)
         )
     except Exception as e:
         logger.exception("Unexpected error during update_user")
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=500,
             content=make_response(None, 500, str(e) if IS_DEV else "Internal server error")
         )
 
 
-@router.delete("/{user_id}", response_model=GenericResponse[None])
-def api_delete_user(user_id: int, db: Annotated[Session, Depends(get_db)]):
-    logger.info(f"Deleting user with ID: {user_id}")
+@router.delete("/{user_id}", response_model=GenericResponse[None], responses={412: {"description": "Precondition failed"}})
+def api_delete_user(user_id: int, db: Annotated[Session, Depends(get_db)], if_match: Optional[str] = Header(None)):
+    logger.info("Deleting user with ID: %s", user_id)
     try:
-        delete_user(db, user_id)
-        logger.info(f"User deleted: {user_id}")
-        return JSONResponse(
+        delete_user(db, user_id, if_match_version(if_match, user_id))
+        logger.info("User deleted: %s", user_id)
+        return FastJSONResponse(
             status_code=200,
             content=make_response(None, 200, "User deleted successfully.")
         )
     except AppException as e:
-        logger.warning(f"AppException during delete_user: {e.message}")
-        return JSONResponse(
+        logger.warning("AppException during delete_user: %s", e.message)
+        return FastJSONResponse(
             status_code=e.status_code,
             content=make_response(None, e.status_code, e.message)
         )
     except Exception as e:
         logger.exception("Unexpected error during delete_user")
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=500,
             content=make_response(None, 500, str(e) if IS_DEV else "Internal server error")
         )
@@ -1,35 +1,154 @@
+import os
+from typing import Iterator
 from sqlalchemy.orm import Session
-from sqlalchemy import text
-from sqlalchemy.exc import SQLAlchemyError
-from src.database.core import load_sql
-from src.users.models import UserIn, UserOut
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from src.database.core import replicas
+from src.database.replicas import reads_from_replica
+from src.database.sql_registry import sql_registry
+from src.users.models import UserIn, UserOut, BulkUserResult, BulkCreateResponse, UserLookupResponse
+from src.users.cache import user_cache
+from src.audit.writer import audit_writer
 from src.utils.db_error_parser import handle_sql_error
 from src.utils.exceptions import AppException
 from src.logger import logger
-from src.utils.pagination import paginate_raw_query
+from src.utils.pagination import paginate_raw_query, paginate_keyset_query
 from src.utils.paginated_response import PaginatedResponse
+from src.utils.hydration import hydrate_rows
+from src.utils.count_strategies import build_count_strategy
+
+sql_registry.require(
+    "users/create_user", "users/get_all_users", "users/count_users",
+    "users/get_user_by_id", "users/update_user", "users/delete_user",
+    "users/get_users_after_id", "users/get_users_by_emails", "users/get_users_by_ids",
+    "users/export_users", "users/get_user_version",
+)
+
+# Total-count strategy for GET /users: exact | cached | estimated | none
+users_count_strategy = build_count_strategy(
+    os.getenv("USERS_COUNT_STRATEGY", "exact"),
+    table="users",
+    ttl=float(os.getenv("USERS_COUNT_TTL", "30")),
+)
+
+BULK_CREATE_MAX_ROWS = int(os.getenv("BULK_CREATE_MAX_ROWS", "1000"))
+BULK_INSERT_CHUNK_SIZE = int(os.getenv("BULK_INSERT_CHUNK_SIZE", "200"))
+USERS_LOOKUP_MAX_IDS = int(os.getenv("USERS_LOOKUP_MAX_IDS", "100"))
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "1000"))
+
 
 def create_user(session: Session, data: UserIn) -> UserOut:
-    logger.debug(f"Creating user with data: {data}")
+    logger.debug("Creating user with data: %s", data)
     try:
-        stmt = text(load_sql("users/create_user.sql"))
-        session.execute(stmt, data.dict())
+        stmt = sql_registry.get("users/create_user")
+        result = session.execute(stmt, data.dict())
+        user_id = result.lastrowid
         session.commit()
-        last_id = session.execute(text("SELECT LAST_INSERT_ID()"))
-        user_id = last_id.scalar()
-        logger.info(f"User created with ID: {user_id}")
-        return get_user_by_id(session, user_id)
+        users_count_strategy.invalidate()
+        user = UserOut(id=user_id, **data.dict())
+        user_cache.set(user)
+        audit_writer.record("user.created", user.model_dump())
+        logger.info("User created with ID: %s", user_id)
+        return user
     except SQLAlchemyError as e:
         session.rollback()
         logger.exception("Database error during user creation")
         handle_sql_error(e, entity="User")
 
 
+def _row_failure(index: int, error: SQLAlchemyError) -> BulkUserResult:
+    try:
+        handle_sql_error(error, entity="User")
+    except AppException as e:
+        return BulkUserResult(index=index, status=e.status_code, message=e.message)
+
+
+def _insert_chunk(session: Session, chunk: list, results: list) -> None:
+    # One multi-row INSERT per chunk (pymysql rewrites executemany into VALUES (...), (...)).
+    # If a concurrent writer took one of the emails, replay the chunk row by row in
+    # savepoints so only the conflicting rows fail.
+    stmt = sql_registry.get("users/create_user")
+    try:
+        with session.begin_nested():
+            session.execute(stmt, [row.dict() for _, row in chunk])
+        return
+    except IntegrityError:
+        logger.warning("Conflict in bulk insert chunk, retrying rows individually")
+
+    for index, row in chunk:
+        try:
+            with session.begin_nested():
+                session.execute(stmt, row.dict())
+        except IntegrityError as e:
+            results[index] = _row_failure(index, e)
+
+
+def insert_users(session: Session, users: list[UserIn]) -> list[BulkUserResult]:
+    results: list[BulkUserResult | None] = [None] * len(users)
+    by_email: dict[str, int] = {}
+    for index, user in enumerate(users):
+        email = user.email.lower()
+        if email in by_email:
+            results[index] = BulkUserResult(index=index, status=409, message="User already exists.")
+        else:
+            by_email[email] = index
+
+    try:
+        if by_email:
+            existing = session.execute(
+                sql_registry.get("users/get_users_by_emails", expanding=["emails"]),
+                {"emails": [users[i].email for i in by_email.values()]}
+            ).all()
+            for row in existing:
+                index = by_email.pop(row.email.lower(), None)
+                if index is not None:
+                    results[index] = BulkUserResult(index=index, status=409, message="User already exists.")
+
+        pending = [(index, users[index]) for index in sorted(by_email.values())]
+        for start in range(0, len(pending), BULK_INSERT_CHUNK_SIZE):
+            _insert_chunk(session, pending[start:start + BULK_INSERT_CHUNK_SIZE], results)
+
+        inserted = [users[index].email for index, _ in pending if results[index] is None]
+        for start in range(0, len(inserted), BULK_INSERT_CHUNK_SIZE):
+            rows = session.execute(
+                sql_registry.get("users/get_users_by_emails", expanding=["emails"]),
+                {"emails": inserted[start:start + BULK_INSERT_CHUNK_SIZE]}
+            ).all()
+            for row in rows:
+                index = by_email.get(row.email.lower())
+                if index is not None and results[index] is None:
+                    results[index] = BulkUserResult(
+                        index=index, status=201, message="User created successfully.",
+                        data=UserOut(**row._mapping)
+                    )
+        session.commit()
+        users_count_strategy.invalidate()
+        for result in results:
+            if result is not None and result.status == 201:
+                audit_writer.record("user.created", result.data.model_dump())
+    except SQLAlchemyError as e:
+        session.rollback()
+        logger.exception("Database error during bulk user creation")
+        handle_sql_error(e, entity="User")
+    return results
+
+
+def create_users_bulk(session: Session, users: list[UserIn]) -> BulkCreateResponse:
+    logger.debug("Bulk creating %s users", len(users))
+    if len(users) > BULK_CREATE_MAX_ROWS:
+        raise AppException(f"Bulk requests are limited to {BULK_CREATE_MAX_ROWS} users", 413, safe_to_show=True)
+
+    results = insert_users(session, users)
+    created = sum(1 for r in results if r.status == 201)
+    logger.info("Bulk created %s of %s users", created, len(users))
+    return BulkCreateResponse(created=created, failed=len(users) - created, results=results)
+
+
+@reads_from_replica
 def get_all_users(session: Session, page: int, size: int) -> PaginatedResponse[UserOut]:
-    logger.debug(f"Getting paginated users - page: {page}, size: {size}")
+    logger.debug("Getting paginated users - page: %s, size: %s", page, size)
     try:
-        data_sql = load_sql("users/get_all_users.sql")
-        count_sql = load_sql("users/count_users.sql")
+        data_sql = sql_registry.get("users/get_all_users")
+        count_sql = sql_registry.get("users/count_users")
 
         paginated = paginate_raw_query(
             session=session,
@@ -37,10 +156,11 @@ def get_all_users(session: Session, page: int, size: int) -> PaginatedResponse[U
             count_sql=count_sql,
             model=UserOut,
             page=page,
-            size=size
+            size=size,
+            count_strategy=users_count_strategy
         )
 
-        logger.info(f"Retrieved {len(paginated.data)} users out of {paginated.total}")
+        logger.info("Retrieved %s users out of %s", len(paginated.data), paginated.total)
         return paginated
 
     except SQLAlchemyError as e:
@@ -48,45 +168,162 @@ def get_all_users(session: Session, page: int, size: int) -> PaginatedResponse[U
         handle_sql_error(e, entity="User")
 
 
-def get_user_by_id(session: Session, user_id: int) -> UserOut:
-    logger.debug(f"Getting user by ID: {user_id}")
+@reads_from_replica
+def get_users_by_cursor(session: Session, cursor: str | None, size: int) -> PaginatedResponse[UserOut]:
+    logger.debug("Getting users by cursor - cursor: %s, size: %s", cursor, size)
     try:
-        stmt = text(load_sql("users/get_user_by_id.sql"))
+        paginated = paginate_keyset_query(
+            session=session,
+            data_sql=sql_registry.get("users/get_users_after_id"),
+            model=UserOut,
+            size=size,
+            cursor=cursor
+        )
+
+        logger.info("Retrieved %s users after cursor", len(paginated.data))
+        return paginated
+
+    except SQLAlchemyError as e:
+        logger.exception("Database error during get_users_by_cursor")
+        handle_sql_error(e, entity="User")
+
+
+def stream_users(chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[list[dict]]:
+    # Runs on its own connection, on a replica when one is configured: the
+    # request-scoped session is closed before a StreamingResponse starts iterating.
+    # yield_per turns on a server-side cursor, so only one chunk of rows is held
+    # in memory at a time.
+    logger.debug("Streaming users export in chunks of %s", chunk_size)
+    exported = 0
+    try:
+        with replicas.connect_for_read() as conn:
+            result = conn.execution_options(yield_per=chunk_size).execute(
+                sql_registry.get("users/export_users")
+            )
+            for partition in result.partitions():
+                rows = [
+                    {"id": row.id, "username": row.username, "email": row.email, "is_active": bool(row.is_active)}
+                    for row in partition
+                ]
+                exported += len(rows)
+                yield rows
+    except SQLAlchemyError as e:
+        logger.exception("Database error during stream_users")
+        handle_sql_error(e, entity="User")
+    logger.info("Exported %s users", exported)
+
+
+@reads_from_replica
+def get_user_by_id(session: Session, user_id: int, version: int | None = None) -> UserOut:
+    logger.debug("Getting user by ID: %s", user_id)
+    cached = user_cache.get(user_id)
+    if cached is not None and (version is None or cached.version == version):
+        return cached
+    try:
+        stmt = sql_registry.get("users/get_user_by_id")
         row = session.execute(stmt, {"user_id": user_id}).first()
         if not row:
             raise AppException(f"User with ID {user_id} not found", 404, safe_to_show=True)
         user = UserOut(**row._mapping)
-        logger.info(f"User found: {user.id}")
+        user_cache.set(user)
+        logger.info("User found: %s", user.id)
         return user
     except SQLAlchemyError as e:
         logger.exception("Database error during get_user_by_id")
         handle_sql_error(e, entity="User")
 
 
-def update_user(session: Session, user_id: int, data: UserIn) -> UserOut:
-    logger.debug(f"Updating user ID {user_id} with data: {data}")
+@reads_from_replica
+def get_users_by_ids(session: Session, user_ids: list[int]) -> UserLookupResponse:
+    logger.debug("Getting users by IDs: %s", user_ids)
+    ids = list(dict.fromkeys(user_ids))
+    if len(ids) > USERS_LOOKUP_MAX_IDS:
+        raise AppException(f"Lookups are limited to {USERS_LOOKUP_MAX_IDS} IDs", 413, safe_to_show=True)
+
+    found: dict[int, UserOut] = {}
+    for user_id in ids:
+        cached = user_cache.get(user_id)
+        if cached is not None:
+            found[user_id] = cached
+
+    to_fetch = [user_id for user_id in ids if user_id not in found]
+    if to_fetch:
+        try:
+            stmt = sql_registry.get("users/get_users_by_ids", expanding=["ids"])
+            for user in hydrate_rows(session.execute(stmt, {"ids": to_fetch}).all(), UserOut):
+                user_cache.set(user)
+                found[user.id] = user
+        except SQLAlchemyError as e:
+            logger.exception("Database error during get_users_by_ids")
+            handle_sql_error(e, entity="User")
+
+    missing = [user_id for user_id in ids if user_id not in found]
+    logger.info("Found %s of %s requested users", len(found), len(ids))
+    return UserLookupResponse(users=[found[i] for i in ids if i in found], missing=missing)
+
+
+def _missing_or_changed(session: Session, user_id: int, expected_version: int | None) -> AppException:
+    if expected_version is not None:
+        row = session.execute(sql_registry.get("users/get_user_version"), {"user_id": user_id}).first()
+        if row is not None:
+            return AppException("Precondition failed: the resource has changed.", 412, safe_to_show=True)
+    return AppException(f"User with ID {user_id} not found", 404, safe_to_show=True)
+
+
+@reads_from_replica
+def get_user_version(session: Session, user_id: int) -> int | None:
+    # What a conditional GET needs to answer 304: a single-column primary key
+    # lookup instead of loading and serializing the row. It never reads the user
+    # cache, which is per process and can lag writes made through another worker.
+    try:
+        row = session.execute(sql_registry.get("users/get_user_version"), {"user_id": user_id}).first()
+        return row.version if row else None
+    except SQLAlchemyError as e:
+        logger.exception("Database error during get_user_version")
+        handle_sql_error(e, entity="User")
+
+
+def update_user(session: Session, user_id: int, data: UserIn, expected_version: int | None = None) -> UserOut:
+    logger.debug("Updating user ID %s with data: %s", user_id, data)
     try:
-        params = data.dict(); params["user_id"] = user_id
-        stmt = text(load_sql("users/update_user.sql"))
-        session.execute(stmt, params)
+        params = data.dict(); params["user_id"] = user_id; params["expected_version"] = expected_version
+        stmt = sql_registry.get("users/update_user")
+        result = session.execute(stmt, params)
+        if result.rowcount == 0:
+            error = _missing_or_changed(session, user_id, expected_version)
+            session.rollback()
+            user_cache.invalidate(user_id)
+            raise error
+        # Read back in the same transaction for the new version.
+        row = session.execute(sql_registry.get("users/get_user_by_id"), {"user_id": user_id}).first()
         session.commit()
-        logger.info(f"User updated with ID: {user_id}")
-        return get_user_by_id(session, user_id)
+        user_cache.invalidate(user_id)
+        user = UserOut(**row._mapping)
+        user_cache.set(user)
+        audit_writer.record("user.updated", user.model_dump())
+        logger.info("User updated with ID: %s", user_id)
+        return user
     except SQLAlchemyError as e:
         session.rollback()
         logger.exception("Database error during update_user")
         handle_sql_error(e, entity="User")
 
 
-def delete_user(session: Session, user_id: int) -> None:
-    logger.debug(f"Deleting user with ID: {user_id}")
+def delete_user(session: Session, user_id: int, expected_version: int | None = None) -> None:
+    logger.debug("Deleting user with ID: %s", user_id)
     try:
-        stmt = text(load_sql("users/delete_user.sql"))
-        result = session.execute(stmt, {"user_id": user_id})
-        session.commit()
+        stmt = sql_registry.get("users/delete_user")
+        result = session.execute(stmt, {"user_id": user_id, "expected_version": expected_version})
         if result.rowcount == 0:
-            raise AppException(f"User with ID {user_id} not found", 404, safe_to_show=True)
-        logger.info(f"User deleted: {user_id}")
+            error = _missing_or_changed(session, user_id, expected_version)
+            session.rollback()
+            user_cache.invalidate(user_id)
+            raise error
+        session.commit()
+        user_cache.invalidate(user_id)
+        users_count_strategy.invalidate()
+        audit_writer.record("user.deleted", {"id": user_id})
+        logger.info("User deleted: %s", user_id)
     except SQLAlchemyError as e:
         session.rollback()
         logger.exception("Database error during delete_user")
@@ -0,0 +1,121 @@
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.elements import TextClause
+from src.database.sql_registry import sql_registry
+
+
+class CountStrategy:
+    # When False, paginators fetch one extra row to work out has_more instead.
+    provides_total = True
+
+    def count(self, session: Session, count_sql: TextClause, params: dict) -> Optional[int]:
+        raise NotImplementedError
+
+    async def count_async(self, session: AsyncSession, count_sql: TextClause, params: dict) -> Optional[int]:
+        raise NotImplementedError
+
+    def invalidate(self) -> None:
+        pass
+
+
+class ExactCount(CountStrategy):
+    def count(self, session, count_sql, params):
+        return session.execute(count_sql, params).scalar()
+
+    async def count_async(self, session, count_sql, params):
+        return (await session.execute(count_sql, params)).scalar()
+
+
+class CachedCount(CountStrategy):
+    def __init__(self, ttl: float = 30.0):
+        self.ttl = ttl
+        self._cache: Dict[Tuple[str, tuple], Tuple[float, int]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(count_sql: TextClause, params: dict) -> Tuple[str, tuple]:
+        return count_sql.text, tuple(sorted(params.items()))
+
+    def _get(self, key) -> Optional[int]:
+        entry = self._cache.get(key)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        return None
+
+    def _set(self, key, total: int) -> None:
+        with self._lock:
+            self._cache[key] = (time.monotonic() + self.ttl, total)
+
+    def count(self, session, count_sql, params):
+        key = self._key(count_sql, params)
+        total = self._get(key)
+        if total is None:
+            total = session.execute(count_sql, params).scalar()
+            self._set(key, total)
+        return total
+
+    async def count_async(self, session, count_sql, params):
+        key = self._key(count_sql, params)
+        total = self._get(key)
+        if total is None:
+            total = (await session.execute(count_sql, params)).scalar()
+            self._set(key, total)
+        return total
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+
+class EstimatedCount(CountStrategy):
+    # InnoDB's TABLE_ROWS is a sampled estimate; it can be off by tens of percent.
+    # Only used for unfiltered listings on MySQL, anything else falls back to COUNT(*).
+    def __init__(self, table: str):
+        self.table = table
+
+    def _use_estimate(self, dialect_name: str, params: dict) -> bool:
+        return dialect_name == "mysql" and not params
+
+    def count(self, session, count_sql, params):
+        if not self._use_estimate(session.get_bind().dialect.name, params):
+            return session.execute(count_sql, params).scalar()
+        stmt = sql_registry.get("stats/estimate_table_rows")
+        estimate = session.execute(stmt, {"table_name": self.table}).scalar()
+        return int(estimate) if estimate is not None else session.execute(count_sql, params).scalar()
+
+    async def count_async(self, session, count_sql, params):
+        if not self._use_estimate(session.get_bind().dialect.name, params):
+            return (await session.execute(count_sql, params)).scalar()
+        stmt = sql_registry.get("stats/estimate_table_rows")
+        estimate = (await session.execute(stmt, {"table_name": self.table})).scalar()
+        if estimate is None:
+            return (await session.execute(count_sql, params)).scalar()
+        return int(estimate)
+
+
+class NoCount(CountStrategy):
+    provides_total = False
+
+    def count(self, session, count_sql, params):
+        return None
+
+    async def count_async(self, session, count_sql, params):
+        return None
+
+
+def build_count_strategy(name: str, table: Optional[str] = None, ttl: float = 30.0) -> CountStrategy:
+    name = name.lower()
+    if name == "exact":
+        return ExactCount()
+    if name == "cached":
+        return CachedCount(ttl=ttl)
+    if name == "estimated":
+        if not table:
+            raise ValueError("The 'estimated' count strategy needs a table name")
+        return EstimatedCount(table)
+    if name == "none":
+        return NoCount()
+    raise ValueError(f"Unknown count strategy '{name}'")
@@ -0,0 +1,60 @@
+import hashlib
+from typing import Optional
+from fastapi import Response
+from src.utils.exceptions import AppException
+
+# Content codings whose suffix encoded_etag appends; comparisons strip it.
+ENCODED_TAG_CODINGS = ("gzip", "br", "zstd")
+
+
+def version_etag(resource_id: int, version: int) -> str:
+    return f'"{resource_id}.{version}"'
+
+
+def content_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def encoded_etag(etag: str, coding: str) -> str:
+    # A compressed body is its own representation and gets its own strong tag.
+    return f'{etag[:-1]}-{coding}"' if etag.endswith('"') else etag
+
+
+def _identity_tag(tag: str) -> str:
+    for coding in ENCODED_TAG_CODINGS:
+        suffix = f'-{coding}"'
+        if tag.endswith(suffix):
+            return tag[:-len(suffix)] + '"'
+    return tag
+
+
+def _tags(header: str) -> list:
+    return [_identity_tag(tag.strip()) for tag in header.split(",") if tag.strip()]
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    # Weak comparison, as RFC 9110 requires for If-None-Match.
+    if not header:
+        return False
+    tags = _tags(header)
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
+
+def if_match_version(header: Optional[str], resource_id: int) -> Optional[int]:
+    # The version an If-Match header requires, or None when any version will
+    # do. A tag that can never match this resource fails the precondition here.
+    if not header:
+        return None
+    tags = _tags(header)
+    if "*" in tags:
+        return None
+    prefix = f'"{resource_id}.'
+    # Strong comparison, as RFC 9110 requires for If-Match: a W/ tag never matches.
+    for tag in tags:
+        if tag.startswith(prefix) and tag.endswith('"') and tag[len(prefix):-1].isdigit():
+            return int(tag[len(prefix):-1])
+    raise AppException("Precondition failed: the resource has changed.", 412, safe_to_show=True)
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
@@ -10,3 +10,13 @@ class AppException(Exception):
             self.message = message
         else:
             self.message = "An unexpected error occurred."
+
+
+class MaliciousPayloadError(AppException):
+    def __init__(self, message: str = "Request blocked due to suspected malicious content."):
+        super().__init__(message, 400, safe_to_show=True)
+
+
+class PayloadTooLargeError(AppException):
+    def __init__(self, message: str):
+        super().__init__(message, 413, safe_to_show=True)
@@ -0,0 +1,9 @@
+from typing import Any
+from fastapi.responses import JSONResponse
+from src.utils import json_codec
+
+
+class FastJSONResponse(JSONResponse):
+    # Serializes with orjson when it is installed, stdlib json otherwise.
+    def render(self, content: Any) -> bytes:
+        return json_codec.dumps(content)
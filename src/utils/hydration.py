@@ -0,0 +1,21 @@
+from functools import lru_cache
+from typing import List, Sequence, Type, TypeVar
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy.engine import Row
+
+T = TypeVar("T", bound=BaseModel)
+
+
+@lru_cache(maxsize=None)
+def _list_adapter(model: Type[T]) -> TypeAdapter:
+    return TypeAdapter(List[model])
+
+
+def hydrate_rows(rows: Sequence[Row], model: Type[T]) -> List[T]:
+    # Validates a whole result set in one call into pydantic-core instead of one
+    # model construction per row. Rows are turned into dicts by zipping the
+    # column names, which is much cheaper than going through Row._mapping.
+    if not rows:
+        return []
+    keys = rows[0]._fields
+    return _list_adapter(model).validate_python([dict(zip(keys, row)) for row in rows])
@@ -1,19 +1,127 @@
+import hashlib
+import json
+import os
+import threading
+import time
 from datetime import datetime, timedelta
-from jose import JWTError, jwt
+from typing import Dict, Optional, Tuple
+from dotenv import load_dotenv
+from jose import JWTError, jwk, jwt
+from jose.backends.base import Key
+from jose.exceptions import JWKError
+from src.logger import logger
+from src.utils.cache import LRUCache
 
-SECRET_KEY = "your-secret-key"  # Change this to something secure
+load_dotenv()
+
+SECRET_KEY = os.getenv("JWT_SECRET_KEY", "your-secret-key")  # Change this to something secure
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# JWKS file ({"keys": [...]}) for tokens whose header carries a `kid`; it is
+# re-read when its mtime changes, checked at most every JWT_KEYS_RELOAD_INTERVAL.
+JWT_KEYS_FILE = os.getenv("JWT_KEYS_FILE")
+JWT_KEYS_RELOAD_INTERVAL = float(os.getenv("JWT_KEYS_RELOAD_INTERVAL", "30"))
+# Verified claims are kept until the token expires, at most JWT_CACHE_TTL;
+# rejected tokens are remembered for JWT_NEGATIVE_TTL only.
+JWT_CACHE_SIZE = int(os.getenv("JWT_CACHE_SIZE", "10000"))
+JWT_CACHE_TTL = float(os.getenv("JWT_CACHE_TTL", "300"))
+JWT_NEGATIVE_TTL = float(os.getenv("JWT_NEGATIVE_TTL", "5"))
+
+_REJECTED = object()
+
+
+class KeySet:
+    # Key objects are built once per load, so a verification does not parse
+    # PEM or JWK data again.
+    def __init__(self, path: Optional[str], reload_interval: float = JWT_KEYS_RELOAD_INTERVAL):
+        self.path = path
+        self.reload_interval = reload_interval
+        self.keys: Dict[str, Tuple[Key, str]] = {}
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def load(self) -> bool:
+        self._checked_at = time.monotonic()
+        mtime = os.path.getmtime(self.path)
+        if mtime == self._mtime:
+            return False
+        with open(self.path, encoding="utf-8") as f:
+            document = json.load(f)
+        keys = {}
+        for entry in document.get("keys", []):
+            if "kid" not in entry or "alg" not in entry:
+                raise JWKError(f"JWT key entries need 'kid' and 'alg' in {self.path}")
+            keys[entry["kid"]] = (jwk.construct(entry, entry["alg"]), entry["alg"])
+        self.keys = keys
+        self._mtime = mtime
+        return True
+
+    def refresh(self) -> bool:
+        # True when the keys changed. A file that fails to load keeps the
+        # current keys, so a bad deploy of the file does not reject everyone.
+        if not self.path or time.monotonic() - self._checked_at < self.reload_interval:
+            return False
+        with self._lock:
+            try:
+                return self.load()
+            except (OSError, ValueError, JWKError):
+                logger.exception("Could not reload JWT keys from %s, keeping %s keys", self.path, len(self.keys))
+                return False
+
+    def get(self, kid: str) -> Optional[Tuple[Key, str]]:
+        return self.keys.get(kid)
+
+
+key_set = KeySet(JWT_KEYS_FILE)
+if JWT_KEYS_FILE:
+    key_set.load()
+_default_key = jwk.construct(SECRET_KEY, ALGORITHM)
+token_cache = LRUCache(max_entries=JWT_CACHE_SIZE, ttl=JWT_CACHE_TTL, sizeof=lambda value: 1)
+
+
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
+
+def _decode(token: str):
+    kid = jwt.get_unverified_header(token).get("kid")
+    if kid is None:
+        return jwt.decode(token, _default_key, algorithms=[ALGORITHM])
+    entry = key_set.get(kid)
+    if entry is None:
+        raise JWTError(f"Unknown key id '{kid}'")
+    # The algorithm comes from the key set, never from the token header.
+    key, algorithm = entry
+    return jwt.decode(token, key, algorithms=[algorithm])
+
+
 def verify_token(token: str):
+    if key_set.refresh():
+        # A rotated-out key must not keep its tokens valid through the cache.
+        token_cache.clear()
+    digest = hashlib.sha256(token.encode("utf-8")).digest()
+    now = time.time()
+    cached = token_cache.get(digest)
+    if cached is _REJECTED:
+        return None
+    if cached is not None:
+        if cached.get("exp", now + 1) > now:
+            return dict(cached)
+        token_cache.delete(digest)
+        return None
+
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
+        payload = _decode(token)
     except JWTError:
-        return None
\ No newline at end of file
+        token_cache.set(digest, _REJECTED, ttl=JWT_NEGATIVE_TTL)
+        return None
+    exp = payload.get("exp")
+    ttl = JWT_CACHE_TTL if not isinstance(exp, (int, float)) else min(JWT_CACHE_TTL, exp - now)
+    if ttl > 0:
+        token_cache.set(digest, dict(payload), ttl=ttl)
+    return payload
@@ -0,0 +1,277 @@
+import atexit
+import glob
+import json
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from dotenv import load_dotenv
+from src.logger import logger
+
+load_dotenv()
+
+EXPOSITION_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[str, ...]
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def collect(self) -> Dict[Labels, object]:
+        raise NotImplementedError
+
+
+class _ThreadSharded(Metric):
+    # Each thread updates its own dict, so the hot path takes no lock; shards are
+    # only summed when the metric is collected.
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._local = threading.local()
+        self._shards: List[dict] = []
+        self._shards_lock = threading.Lock()
+
+    def _shard(self) -> dict:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            with self._shards_lock:
+                self._shards.append(shard)
+            return shard
+
+    def _shard_items(self):
+        with self._shards_lock:
+            shards = list(self._shards)
+        for shard in shards:
+            yield from list(shard.items())
+
+
+class Counter(_ThreadSharded):
+    kind = "counter"
+
+    def inc(self, labels: Labels = (), amount: float = 1.0) -> None:
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0.0) + amount
+
+    def collect(self) -> Dict[Labels, float]:
+        totals: Dict[Labels, float] = {}
+        for labels, value in self._shard_items():
+            totals[labels] = totals.get(labels, 0.0) + value
+        return totals
+
+
+class Histogram(_ThreadSharded):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, labels: Labels = ()) -> None:
+        # State is one count per bucket plus +Inf (not cumulative), then the sum.
+        shard = self._shard()
+        state = shard.get(labels)
+        if state is None:
+            state = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        state[bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+    def collect(self) -> Dict[Labels, List[float]]:
+        totals: Dict[Labels, List[float]] = {}
+        for labels, state in self._shard_items():
+            total = totals.get(labels)
+            totals[labels] = list(state) if total is None else [a + b for a, b in zip(total, state)]
+        return totals
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Labels = (), amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, labels: Labels = (), amount: float = 1.0) -> None:
+        self.inc(labels, -amount)
+
+    def set(self, value: float, labels: Labels = ()) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+    def collect(self) -> Dict[Labels, float]:
+        with self._lock:
+            return dict(self._values)
+
+
+class CallbackGauge(Metric):
+    # Values are read from `callback` at collection time, e.g. cache statistics.
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames, callback: Callable[[], Dict[Labels, float]]):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def collect(self) -> Dict[Labels, float]:
+        return dict(self.callback())
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class MetricsRegistry:
+    # With `directory` set, every worker process periodically writes its own
+    # snapshot there and a scrape merges all of them: counters and histograms
+    # are summed across every process that ever wrote (so they stay monotonic),
+    # gauges only across processes that are still alive. Clear the directory
+    # before starting the server.
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory
+        self.metrics: Dict[str, Metric] = {}
+        self._flusher: Optional[threading.Thread] = None
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric '{metric.name}' is already registered")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback_gauge(
+        self, name: str, documentation: str, labelnames: Sequence[str], callback: Callable[[], Dict[Labels, float]]
+    ) -> CallbackGauge:
+        return self.register(CallbackGauge(name, documentation, labelnames, callback))
+
+    def _snapshot_path(self, pid: int) -> str:
+        return os.path.join(self.directory, f"metrics-{pid}.json")
+
+    def write_snapshot(self) -> None:
+        snapshot = {
+            name: [[list(labels), value] for labels, value in metric.collect().items()]
+            for name, metric in self.metrics.items()
+        }
+        path = self._snapshot_path(os.getpid())
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, path)
+
+    def start_flusher(self, interval: float) -> None:
+        if self.directory is None or self._flusher is not None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+
+        def run() -> None:
+            while True:
+                try:
+                    self.write_snapshot()
+                except OSError:
+                    logger.exception("Failed to write metrics snapshot to %s", self.directory)
+                time.sleep(interval)
+
+        self._flusher = threading.Thread(target=run, name="metrics-flusher", daemon=True)
+        self._flusher.start()
+        atexit.register(self.write_snapshot)
+
+    def _collect_all(self) -> Dict[str, Dict[Labels, object]]:
+        collected = {name: metric.collect() for name, metric in self.metrics.items()}
+        if self.directory is None:
+            return collected
+
+        own = self._snapshot_path(os.getpid())
+        for path in glob.glob(os.path.join(self.directory, "metrics-*.json")):
+            if path == own:
+                continue
+            try:
+                pid = int(os.path.basename(path)[len("metrics-"):-len(".json")])
+                with open(path) as f:
+                    snapshot = json.load(f)
+            except (ValueError, OSError):
+                continue
+            alive = _pid_alive(pid)
+            for name, entries in snapshot.items():
+                metric = self.metrics.get(name)
+                if metric is None or (metric.kind == "gauge" and not alive):
+                    continue
+                values = collected[name]
+                for labels, value in entries:
+                    labels = tuple(labels)
+                    current = values.get(labels)
+                    if current is None:
+                        values[labels] = value
+                    elif isinstance(current, list):
+                        values[labels] = [a + b for a, b in zip(current, value)]
+                    else:
+                        values[labels] = current + value
+        return collected
+
+    def render(self) -> str:
+        lines = []
+        for name, values in self._collect_all().items():
+            metric = self.metrics[name]
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            for labels, value in sorted(values.items()):
+                if metric.kind == "histogram":
+                    cumulative = 0
+                    for bound, count in zip(metric.buckets + (math.inf,), value[:-1]):
+                        cumulative += count
+                        bucket_labels = _format_labels(metric.labelnames + ("le",), labels + (_format_value(bound),))
+                        lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+                    label_text = _format_labels(metric.labelnames, labels)
+                    lines.append(f"{name}_sum{label_text} {_format_value(value[-1])}")
+                    lines.append(f"{name}_count{label_text} {cumulative}")
+                else:
+                    lines.append(f"{name}{_format_labels(metric.labelnames, labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry(os.getenv("METRICS_DIR") or None)
@@ -0,0 +1,44 @@
+from typing import List
+from src.utils.exceptions import PayloadTooLargeError
+
+
+class LineSplitter:
+    # Splits a streamed body into lines. Only each new chunk is split and an
+    # unterminated line is kept in one growing buffer, so the work stays linear
+    # in the body size however the client chunks it.
+    def __init__(self, max_line_size: int):
+        self.max_line_size = max_line_size
+        self.lines = 0
+        self._pending = bytearray()
+
+    def _too_long(self, line_no: int) -> PayloadTooLargeError:
+        return PayloadTooLargeError(f"Line {line_no} exceeds {self.max_line_size} bytes")
+
+    def _complete(self, lines: List[bytes]) -> List[bytes]:
+        if max(map(len, lines)) > self.max_line_size:
+            for offset, line in enumerate(lines, 1):
+                if len(line) > self.max_line_size:
+                    raise self._too_long(self.lines + offset)
+        self.lines += len(lines)
+        return lines
+
+    def feed(self, chunk: bytes) -> List[bytes]:
+        *lines, tail = chunk.split(b"\n")
+        if lines:
+            if self._pending:
+                self._pending += lines[0]
+                lines[0] = bytes(self._pending)
+                self._pending.clear()
+            self._complete(lines)
+        self._pending += tail
+        if len(self._pending) > self.max_line_size:
+            raise self._too_long(self.lines + 1)
+        return lines
+
+    def finish(self) -> List[bytes]:
+        # The last line when the body does not end with a newline.
+        if not self._pending:
+            return []
+        line = bytes(self._pending)
+        self._pending.clear()
+        return self._complete([line])
@@ -1,10 +1,12 @@
-from typing import TypeVar, Generic, List
+from typing import TypeVar, Generic, List, Optional
 from pydantic.generics import GenericModel
 
 T = TypeVar("T")
 
 class PaginatedResponse(GenericModel, Generic[T]):
-    total: int
-    page: int
+    total: Optional[int] = None
+    page: Optional[int] = None
     size: int
-    data: List[T]
\ No newline at end of file
+    data: List[T]
+    has_more: Optional[bool] = None
+    next_cursor: Optional[str] = None
@@ -1,32 +1,150 @@
-from typing import Type, TypeVar
+import base64
+import binascii
+import json
+from typing import Type, TypeVar, Union
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
+from sqlalchemy.sql.elements import TextClause
 from pydantic import BaseModel
+from src.utils.count_strategies import CountStrategy, ExactCount
+from src.utils.exceptions import AppException
+from src.utils.hydration import hydrate_rows
 from src.utils.paginated_response import PaginatedResponse
 from typing import Optional
 
 T = TypeVar("T", bound=BaseModel)
 
+_EXACT_COUNT = ExactCount()
+
+
+def _as_statement(sql: Union[str, TextClause]) -> TextClause:
+    return text(sql) if isinstance(sql, str) else sql
+
+
+def encode_cursor(values: dict) -> str:
+    raw = json.dumps(values, separators=(",", ":"), default=str).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (binascii.Error, UnicodeError, ValueError):
+        raise AppException("Invalid pagination cursor.", 400, safe_to_show=True)
+    if not isinstance(values, dict):
+        raise AppException("Invalid pagination cursor.", 400, safe_to_show=True)
+    return values
+
+
+def _keyset_params(cursor: Optional[str], key: str, start, size: int, params: Optional[dict]) -> dict:
+    after = decode_cursor(cursor).get(key, start) if cursor else start
+    if type(after) is not type(start):
+        raise AppException("Invalid pagination cursor.", 400, safe_to_show=True)
+    return {**(params or {}), f"after_{key}": after, "limit": size + 1}
+
+
+def _keyset_page(rows, model: Type[T], key: str, size: int) -> PaginatedResponse[T]:
+    has_more = len(rows) > size
+    items = hydrate_rows(rows[:size], model)
+    next_cursor = encode_cursor({key: getattr(items[-1], key)}) if has_more else None
+
+    return PaginatedResponse[T].model_construct(
+        size=size,
+        data=items,
+        has_more=has_more,
+        next_cursor=next_cursor
+    )
+
+
+def _offset_params(page: int, size: int, strategy: CountStrategy, params: Optional[dict]) -> dict:
+    # Without a total, one extra row tells us whether another page exists.
+    limit = size if strategy.provides_total else size + 1
+    return {**(params or {}), "limit": limit, "offset": (page - 1) * size}
+
+
+def _offset_page(rows, total: Optional[int], model: Type[T], page: int, size: int) -> PaginatedResponse[T]:
+    if total is None:
+        has_more = len(rows) > size
+        rows = rows[:size]
+    else:
+        has_more = (page - 1) * size + len(rows) < total
+    items = hydrate_rows(rows, model)
+
+    return PaginatedResponse[T].model_construct(
+        total=total,
+        page=page,
+        size=size,
+        data=items,
+        has_more=has_more
+    )
+
+
 def paginate_raw_query(
     session: Session,
-    data_sql: str,
-    count_sql: str,
+    data_sql: Union[str, TextClause],
+    count_sql: Union[str, TextClause],
     model: Type[T],
     page: int,
     size: int,
-    params: Optional[dict] = None 
+    params: Optional[dict] = None,
+    count_strategy: Optional[CountStrategy] = None
 ) -> PaginatedResponse[T]:
-    offset = (page - 1) * size
-    query_params = {**(params or {}), "limit": size, "offset": offset}
+    strategy = count_strategy or _EXACT_COUNT
+    query_params = _offset_params(page, size, strategy, params)
 
-    data_rows = session.execute(text(data_sql), query_params).all()
-    total = session.execute(text(count_sql), params or {}).scalar()
+    data_rows = session.execute(_as_statement(data_sql), query_params).all()
+    total = strategy.count(session, _as_statement(count_sql), params or {})
 
-    items = [model(**row._mapping) for row in data_rows]
+    return _offset_page(data_rows, total, model, page, size)
 
-    return PaginatedResponse[T](
-        total=total,
-        page=page,
-        size=size,
-        data=items
-    )
\ No newline at end of file
+
+def paginate_keyset_query(
+    session: Session,
+    data_sql: Union[str, TextClause],
+    model: Type[T],
+    size: int,
+    cursor: Optional[str] = None,
+    key: str = "id",
+    start=0,
+    params: Optional[dict] = None
+) -> PaginatedResponse[T]:
+    # data_sql must filter on `<key> > :after_<key>`, order by <key> and apply :limit.
+    query_params = _keyset_params(cursor, key, start, size, params)
+    rows = session.execute(_as_statement(data_sql), query_params).all()
+    return _keyset_page(rows, model, key, size)
+
+
+async def paginate_raw_query_async(
+    session: AsyncSession,
+    data_sql: Union[str, TextClause],
+    count_sql: Union[str, TextClause],
+    model: Type[T],
+    page: int,
+    size: int,
+    params: Optional[dict] = None,
+    count_strategy: Optional[CountStrategy] = None
+) -> PaginatedResponse[T]:
+    strategy = count_strategy or _EXACT_COUNT
+    query_params = _offset_params(page, size, strategy, params)
+
+    data_rows = (await session.execute(_as_statement(data_sql), query_params)).all()
+    total = await strategy.count_async(session, _as_statement(count_sql), params or {})
+
+    return _offset_page(data_rows, total, model, page, size)
+
+
+async def paginate_keyset_query_async(
+    session: AsyncSession,
+    data_sql: Union[str, TextClause],
+    model: Type[T],
+    size: int,
+    cursor: Optional[str] = None,
+    key: str = "id",
+    start=0,
+    params: Optional[dict] = None
+) -> PaginatedResponse[T]:
+    query_params = _keyset_params(cursor, key, start, size, params)
+    rows = (await session.execute(_as_statement(data_sql), query_params)).all()
+    return _keyset_page(rows, model, key, size)
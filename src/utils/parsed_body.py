@@ -0,0 +1,29 @@
+from typing import Any, Callable, Coroutine
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from src.utils import json_codec
+
+# Set by BlockMaliciousPayloadMiddleware to the JSON document it already decoded.
+PARSED_JSON_SCOPE_KEY = "infra.parsed_json"
+
+_MISSING = object()
+
+
+class ParsedBodyRequest(Request):
+    async def json(self) -> Any:
+        if not hasattr(self, "_json"):
+            parsed = self.scope.get(PARSED_JSON_SCOPE_KEY, _MISSING)
+            self._json = json_codec.loads(await self.body()) if parsed is _MISSING else parsed
+        return self._json
+
+
+class ParsedBodyRoute(APIRoute):
+    # Reuses the sanitizer's decoded body for FastAPI's body validation so JSON
+    # writes are parsed once per request.
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+
+        async def route_handler(request: Request) -> Response:
+            return await handler(ParsedBodyRequest(request.scope, request.receive))
+
+        return route_handler
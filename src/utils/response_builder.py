@@ -1,9 +1,10 @@
 from typing import Any
-from src.utils.response_models import GenericResponse
+from pydantic import BaseModel
+
 
 def make_response(data: Any, status: int, message: str) -> dict:
-    return GenericResponse(
-        status=status,
-        message=message,
-        data=data
-    ).model_dump()
\ No newline at end of file
+    # Same shape as GenericResponse, built directly: callers pass already
+    # serialized data, so validating the envelope again only costs time.
+    if isinstance(data, BaseModel):
+        data = data.model_dump()
+    return {"status": status, "message": message, "data": data}
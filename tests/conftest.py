@@ -1,2 +1,46 @@
 import sys, os
+import tempfile
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+_tmpdir = tempfile.mkdtemp(prefix="tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmpdir}/test.db")
+os.environ.setdefault("LOG_FILE", os.path.join(_tmpdir, "app.log"))
+
+import pytest  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+
+# The migrations are MySQL DDL; these are the same tables in SQLite's dialect.
+SQLITE_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username VARCHAR(100) NOT NULL,
+        email VARCHAR(255) NOT NULL UNIQUE,
+        is_active TINYINT(1) DEFAULT 1,
+        version INT NOT NULL DEFAULT 1
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS audit_logs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        event_type VARCHAR(100) NOT NULL,
+        event_data TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+)
+
+
+def create_schema(engine):
+    with engine.begin() as conn:
+        for ddl in SQLITE_SCHEMA:
+            conn.execute(text(ddl))
+        conn.execute(text("DELETE FROM users"))
+        conn.execute(text("DELETE FROM audit_logs"))
+
+
+@pytest.fixture
+def db_engine():
+    from src.database.core import engine
+    create_schema(engine)
+    return engine
@@ -0,0 +1,112 @@
+import asyncio
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from src.database.async_core import to_async_url
+from src.database.core import DATABASE_URL
+from src.database.pool import pool_options
+from src.database.replicas import ReplicaSet, RoutingSession
+from src.users import async_service
+from src.users.async_router import get_async_db, router
+from src.users.cache import user_cache
+from src.users.models import UserIn
+from src.utils.exceptions import AppException
+
+
+def build_sessions():
+    # Built as async_core builds it when USE_ASYNC_DB is set, against the test database.
+    url = to_async_url(DATABASE_URL)
+    engine = create_async_engine(url, **pool_options(url, instrumented=False))
+    return engine, async_sessionmaker(
+        bind=engine, class_=AsyncSession, sync_session_class=RoutingSession,
+        replicas=ReplicaSet(engine.sync_engine, []), autoflush=False, expire_on_commit=False
+    )
+
+
+@pytest.fixture
+def run(db_engine):
+    engine, sessions = build_sessions()
+
+    def run(func, *args, **kwargs):
+        async def call():
+            async with sessions() as session:
+                return await func(session, *args, **kwargs)
+        return asyncio.run(call())
+
+    yield run
+    asyncio.run(engine.dispose())
+
+
+def user_in(name: str) -> UserIn:
+    return UserIn(username=name, email=f"{name}@example.com", is_active=True)
+
+
+def test_create_and_get(run):
+    created = run(async_service.create_user, user_in("alice"))
+    fetched = run(async_service.get_user_by_id, created.id)
+    assert (fetched.username, fetched.version) == ("alice", 1)
+    assert run(async_service.get_user_version, created.id) == 1
+
+
+def test_pages_and_cursor(run):
+    ids = [run(async_service.create_user, user_in(f"user{i}")).id for i in range(5)]
+    page = run(async_service.get_all_users, 1, 2)
+    assert page.total == 5
+    assert [user.id for user in page.data] == ids[:2]
+
+    first = run(async_service.get_users_by_cursor, "", 3)
+    second = run(async_service.get_users_by_cursor, first.next_cursor, 3)
+    assert [user.id for user in first.data + second.data] == ids
+    assert second.has_more is False
+
+
+def test_update_checks_the_expected_version(run):
+    user = run(async_service.create_user, user_in("bob"))
+    updated = run(async_service.update_user, user.id, user_in("bobby"), expected_version=1)
+    assert (updated.username, updated.version) == ("bobby", 2)
+    with pytest.raises(AppException) as error:
+        run(async_service.update_user, user.id, user_in("robert"), expected_version=1)
+    assert error.value.status_code == 412
+
+
+def test_delete(run):
+    user = run(async_service.create_user, user_in("carol"))
+    run(async_service.delete_user, user.id)
+    with pytest.raises(AppException) as error:
+        run(async_service.get_user_by_id, user.id)
+    assert error.value.status_code == 404
+    assert run(async_service.get_user_version, user.id) is None
+
+
+def test_writes_refresh_the_cache_and_are_audited(run, monkeypatch):
+    events = []
+    monkeypatch.setattr(async_service.audit_writer, "record", lambda event_type, data: events.append(event_type))
+    user = run(async_service.create_user, user_in("dave"))
+    run(async_service.update_user, user.id, user_in("david"))
+    assert user_cache.get(user.id).username == "david"
+    run(async_service.delete_user, user.id)
+    assert user_cache.get(user.id) is None
+    assert events == ["user.created", "user.updated", "user.deleted"]
+
+
+def test_router_checks_if_match(db_engine):
+    engine, sessions = build_sessions()
+
+    async def get_db():
+        async with sessions() as session:
+            yield session
+
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_async_db] = get_db
+    with TestClient(app) as client:
+        user_id = client.post("/users/", json={"username": "erin", "email": "erin@example.com"}).json()["data"]["id"]
+        body = {"username": "erin2", "email": "erin@example.com", "is_active": True}
+        assert client.put(f"/users/{user_id}", json=body, headers={"If-Match": f'"{user_id}.7"'}).status_code == 412
+        updated = client.put(f"/users/{user_id}", json=body, headers={"If-Match": f'"{user_id}.1"'})
+        assert updated.headers["etag"] == f'"{user_id}.2"'
+        assert client.delete(f"/users/{user_id}", headers={"If-Match": f'"{user_id}.1"'}).status_code == 412
+        assert client.delete(f"/users/{user_id}", headers={"If-Match": f'"{user_id}.2"'}).status_code == 200
+        # Dispose on the client's event loop, where the connections were made.
+        client.portal.call(engine.dispose)
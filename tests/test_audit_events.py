@@ -0,0 +1,43 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from src.audit.router import router
+from src.dependencies.jwt_auth import get_current_user
+
+
+@pytest.fixture
+def client(db_engine):
+    with db_engine.begin() as conn:
+        conn.execute(
+            text("INSERT INTO audit_logs (event_type, event_data, created_at) VALUES (:type, NULL, :created_at)"),
+            [
+                {"type": "user.created", "created_at": "2019-12-31 23:00:00"},
+                {"type": "user.updated", "created_at": "2020-01-01 00:30:00"},
+                {"type": "user.deleted", "created_at": "2020-01-02 12:00:00"},
+            ],
+        )
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_current_user] = lambda: {"sub": "tester"}
+    return TestClient(app)
+
+
+def event_types(response):
+    assert response.status_code == 200, response.text
+    return [event["event_type"] for event in response.json()["data"]["data"]]
+
+
+def test_since_with_z_suffix(client):
+    response = client.get("/audit/events", params={"since": "2020-01-01T00:00:00Z"})
+    assert event_types(response) == ["user.deleted", "user.updated"]
+
+
+def test_aware_bounds_are_converted_to_utc(client):
+    params = {"since": "2020-01-01T01:00:00+01:00", "until": "2020-01-02T13:00:00+02:00"}
+    assert event_types(client.get("/audit/events", params=params)) == ["user.updated"]
+
+
+def test_since_after_until(client):
+    params = {"since": "2020-01-02T00:00:00Z", "until": "2020-01-01T00:00:00"}
+    assert client.get("/audit/events", params=params).status_code == 400
@@ -0,0 +1,43 @@
+import threading
+from datetime import datetime
+from src.audit.writer import AuditWriter
+from src.database.core import engine
+
+
+def event(n: int) -> dict:
+    return {"event_type": f"event{n}", "event_data": "{}", "created_at": datetime(2020, 1, 1)}
+
+
+def event_types(events):
+    return [event["event_type"] for event in events]
+
+
+def test_spilled_events_are_replayed_once(tmp_path):
+    writer = AuditWriter(engine, spill_path=str(tmp_path / "spill.jsonl"))
+    writer._spill([event(1), event(2)])
+    assert event_types(writer._load_spill()) == ["event1", "event2"]
+    assert writer._load_spill() == []
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_an_append_racing_a_load_is_not_lost(tmp_path):
+    path = str(tmp_path / "spill.jsonl")
+    loader, other = AuditWriter(engine, spill_path=path), AuditWriter(engine, spill_path=path)
+    loader._spill([event(1)])
+
+    # Another worker is mid-append while the loader starts: the loader renames
+    # the file and then waits for the append to finish before reading it.
+    f = other._open_spill()
+    loaded = []
+    thread = threading.Thread(target=lambda: loaded.extend(loader._load_spill()))
+    thread.start()
+    thread.join(0.2)
+    assert thread.is_alive()
+    f.write(b'{"event_type":"event2","event_data":"{}","created_at":"2020-01-01T00:00:00"}\n')
+    f.close()
+    thread.join()
+    assert event_types(loaded) == ["event1", "event2"]
+
+    # Later appends go to a fresh file, not the renamed one.
+    other._spill([event(3)])
+    assert event_types(loader._load_spill()) == ["event3"]
@@ -0,0 +1,92 @@
+import pytest
+from fastapi import FastAPI, Header, Response
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from typing import Optional
+from src.middlewares.compression import CompressionMiddleware, negotiate, parse_accept_encoding
+from src.utils.etags import etag_matches, if_match_version
+
+BIG = b"x" * 5000
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=1024, preference=("gzip",))
+
+    @app.get("/big")
+    def big(if_none_match: Optional[str] = Header(None)):
+        if etag_matches(if_none_match, '"1.1"'):
+            return Response(status_code=304, headers={"ETag": '"1.1"'})
+        return Response(BIG, media_type="application/json", headers={"ETag": '"1.1"'})
+
+    @app.get("/small")
+    def small():
+        return Response(b"{}", media_type="application/json", headers={"ETag": '"2.1"'})
+
+    @app.get("/image")
+    def image():
+        return Response(BIG, media_type="image/png")
+
+    return TestClient(app)
+
+
+def test_parse_and_negotiate():
+    assert parse_accept_encoding("gzip;q=0.5, br, zstd;q=0") == {"gzip": 0.5, "br": 1.0, "zstd": 0.0}
+    assert negotiate("gzip, br", ("zstd", "br", "gzip")) == "br"
+    assert negotiate("zstd;q=0, *", ("zstd", "gzip")) == "gzip"
+    assert negotiate("identity", ("gzip",)) is None
+
+
+def test_large_body_is_compressed_with_its_own_strong_tag(client):
+    response = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["etag"] == '"1.1-gzip"'
+    assert response.content == BIG
+
+
+def test_small_body_keeps_the_identity_tag(client):
+    response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["etag"] == '"2.1"'
+
+
+def test_not_modified_returns_the_tag_the_client_sent(client):
+    headers = {"Accept-Encoding": "gzip", "If-None-Match": '"1.1-gzip"'}
+    response = client.get("/big", headers=headers)
+    assert response.status_code == 304
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["etag"] == '"1.1-gzip"'
+
+
+def test_no_negotiation_leaves_the_response_alone(client):
+    response = client.get("/big", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert "vary" not in response.headers
+    assert response.headers["etag"] == '"1.1"'
+
+
+def test_compressed_content_types_are_skipped(client):
+    response = client.get("/image", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+
+
+def test_streamed_body_is_compressed_in_chunks():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, preference=("gzip",))
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse(iter([b"a" * 100, b"b" * 100]), media_type="application/x-ndjson")
+
+    response = TestClient(app).get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.content == b"a" * 100 + b"b" * 100
+
+
+def test_encoded_tags_compare_as_their_identity_tag():
+    assert etag_matches('"1.1-gzip"', '"1.1"')
+    assert etag_matches('W/"1.1-br"', '"1.1"')
+    assert if_match_version('"7.3-zstd"', 7) == 3
@@ -0,0 +1,98 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import time
+import pytest
+import rsa
+from jose import jwk, jwt
+from src.utils import jwt_handler
+from src.utils.jwt_handler import KeySet, create_access_token, token_cache, verify_token
+
+
+def rsa_key(kid: str):
+    public_key, private_key = rsa.newkeys(1024)
+    public_pem = public_key.save_pkcs1().decode("ascii")
+    entry = {**jwk.construct(public_pem, "RS256").to_dict(), "kid": kid}
+    return entry, private_key.save_pkcs1().decode("ascii"), public_pem
+
+
+K1, K1_PRIVATE, K1_PUBLIC = rsa_key("k1")
+K2, K2_PRIVATE, _ = rsa_key("k2")
+
+
+def write_keys(path, *entries):
+    with open(path, "w") as f:
+        json.dump({"keys": list(entries)}, f)
+
+
+def base64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def signed(private_pem: str, kid: str) -> str:
+    return jwt.encode({"sub": "alice", "exp": int(time.time()) + 600}, private_pem, algorithm="RS256", headers={"kid": kid})
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    token_cache.clear()
+    yield
+    token_cache.clear()
+
+
+@pytest.fixture
+def keys_file(tmp_path, monkeypatch):
+    path = str(tmp_path / "jwks.json")
+    write_keys(path, K1, K2)
+    key_set = KeySet(path, reload_interval=0)
+    key_set.load()
+    monkeypatch.setattr(jwt_handler, "key_set", key_set)
+    return path
+
+
+def test_verified_claims_are_cached_as_copies():
+    token = create_access_token({"sub": "alice"})
+    first = verify_token(token)
+    first["sub"] = "mallory"
+    assert verify_token(token)["sub"] == "alice"
+    assert token_cache.hits == 1
+
+
+def test_rejected_tokens_are_cached_briefly():
+    token = create_access_token({"sub": "alice"})[:-2] + "xx"
+    assert verify_token(token) is None
+    misses = token_cache.misses
+    assert verify_token(token) is None
+    assert token_cache.misses == misses
+
+
+def test_kid_selects_the_key(keys_file):
+    assert verify_token(signed(K2_PRIVATE, "k2"))["sub"] == "alice"
+    assert verify_token(signed(K2_PRIVATE, "k1")) is None
+    assert verify_token(signed(K2_PRIVATE, "k9")) is None
+
+
+def test_algorithm_comes_from_the_key_set(keys_file):
+    # An HS256 token "signed" with k1's public key must not verify against k1.
+    header = base64url(json.dumps({"alg": "HS256", "typ": "JWT", "kid": "k1"}).encode())
+    payload = base64url(json.dumps({"sub": "alice"}).encode())
+    signature = hmac.new(K1_PUBLIC.encode(), f"{header}.{payload}".encode(), hashlib.sha256).digest()
+    assert verify_token(f"{header}.{payload}.{base64url(signature)}") is None
+
+
+def test_reload_drops_cached_tokens_of_a_removed_key(keys_file):
+    token = signed(K1_PRIVATE, "k1")
+    assert verify_token(token) is not None
+    write_keys(keys_file, K2)
+    os.utime(keys_file, (time.time() + 5, time.time() + 5))
+    assert verify_token(token) is None
+    assert verify_token(signed(K2_PRIVATE, "k2")) is not None
+
+
+def test_a_broken_keys_file_keeps_the_current_keys(keys_file):
+    with open(keys_file, "w") as f:
+        f.write("{not json")
+    os.utime(keys_file, (time.time() + 5, time.time() + 5))
+    assert verify_token(signed(K1_PRIVATE, "k1")) is not None
@@ -0,0 +1,68 @@
+import pytest
+from sqlalchemy import create_engine, inspect
+from src.database.migrations import MigrationError, apply_migrations, migration_lock, schema_version
+from src.sql.migrations.migrations import MIGRATIONS
+
+
+@pytest.fixture
+def engine(tmp_path):
+    return create_engine(f"sqlite:///{tmp_path}/migrations.db")
+
+
+def test_apply_all_then_nothing(engine):
+    assert apply_migrations(engine) == len(MIGRATIONS)
+    assert schema_version(engine) == MIGRATIONS[-1][0]
+    assert apply_migrations(engine) == 0
+    indexes = {index["name"] for index in inspect(engine).get_indexes("audit_logs")}
+    assert {"idx_audit_logs_created_at_id", "idx_audit_logs_event_type_created_at_id"} <= indexes
+
+
+def test_every_migration_is_one_statement():
+    for version, name, sql in MIGRATIONS:
+        assert sql.count(";") == 1, name
+
+
+def test_a_multi_statement_migration_is_refused(engine):
+    migrations = [(1, "two", "CREATE TABLE a (id INT); CREATE TABLE b (id INT);")]
+    with pytest.raises(MigrationError, match="exactly one statement"):
+        apply_migrations(engine, migrations)
+
+
+def test_a_changed_migration_is_refused(engine):
+    apply_migrations(engine, [(1, "t", "CREATE TABLE t (id INT);")])
+    with pytest.raises(MigrationError, match="was changed"):
+        apply_migrations(engine, [(1, "t", "CREATE TABLE t (id BIGINT);")])
+
+
+class FakeMySQLConnection:
+    class dialect:
+        name = "mysql"
+
+    def __init__(self, acquired: int):
+        self.acquired = acquired
+        self.statements = []
+
+    def execute(self, statement, params=None):
+        self.statements.append(statement.text)
+        acquired = self.acquired
+
+        class Result:
+            def scalar(self):
+                return acquired
+
+        return Result()
+
+
+def test_migration_lock_is_taken_and_released():
+    conn = FakeMySQLConnection(acquired=1)
+    with migration_lock(conn, timeout=5):
+        assert conn.statements == ["SELECT GET_LOCK(:name, :timeout)"]
+    assert conn.statements[-1] == "SELECT RELEASE_LOCK(:name)"
+
+
+def test_migration_lock_timeout():
+    conn = FakeMySQLConnection(acquired=0)
+    with pytest.raises(MigrationError, match="Timed out"):
+        with migration_lock(conn, timeout=5):
+            pass
+    assert len(conn.statements) == 1
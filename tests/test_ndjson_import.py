@@ -0,0 +1,72 @@
+import json
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from src.middlewares.sanitization import BlockMaliciousPayloadMiddleware
+from src.users.router import router
+from src.utils.exceptions import PayloadTooLargeError
+from src.utils.ndjson import LineSplitter
+
+NDJSON = {"Content-Type": "application/x-ndjson"}
+
+
+def user_line(i: int, username: str = None) -> bytes:
+    return json.dumps({"username": username or f"user{i}", "email": f"user{i}@example.com"}).encode() + b"\n"
+
+
+def test_splitter_joins_lines_across_chunks():
+    splitter = LineSplitter(max_line_size=100)
+    assert splitter.feed(b'{"a"') == []
+    assert splitter.feed(b':1}\n{"b":2}\n{"c"') == [b'{"a":1}', b'{"b":2}']
+    assert splitter.feed(b":3}") == []
+    assert splitter.finish() == [b'{"c":3}']
+    assert splitter.lines == 3
+
+
+def test_splitter_rejects_a_long_line_before_it_ends():
+    splitter = LineSplitter(max_line_size=8)
+    splitter.feed(b"short\n")
+    with pytest.raises(PayloadTooLargeError, match="Line 2 exceeds 8 bytes"):
+        splitter.feed(b"x" * 9)
+
+
+@pytest.fixture
+def client(db_engine):
+    app = FastAPI()
+    app.include_router(router)
+    app.add_middleware(BlockMaliciousPayloadMiddleware, max_line_size=256, max_stream_size=4096)
+    return TestClient(app)
+
+
+def test_import(client):
+    body = b"".join(user_line(i) for i in range(3))
+    response = client.post("/users/import", content=body, headers=NDJSON)
+    assert response.status_code == 200, response.text
+    assert response.json()["data"]["created"] == 3
+
+
+def test_import_blocks_a_malicious_line(client):
+    body = user_line(1) + user_line(2, username="<script>alert(1)</script>")
+    assert client.post("/users/import", content=body, headers=NDJSON).status_code == 400
+
+
+def test_import_blocks_an_escaped_malicious_line(client):
+    body = user_line(1, username="<ſcript>")
+    assert client.post("/users/import", content=body, headers=NDJSON).status_code == 400
+
+
+def test_import_rejects_a_long_line(client):
+    body = user_line(1) + b'{"username": "' + b"x" * 300 + b'"}\n'
+    response = client.post("/users/import", content=body, headers=NDJSON)
+    assert response.status_code == 413
+    assert "Line 2" in response.text
+
+
+def test_import_rejects_a_body_over_the_total_cap(client):
+    body = b"".join(user_line(i) for i in range(200))
+    assert client.post("/users/import", content=body, headers=NDJSON).status_code == 413
+
+
+def test_import_rejects_a_chunked_body_over_the_total_cap(client):
+    chunks = iter([user_line(i) for i in range(200)])
+    assert client.post("/users/import", content=chunks, headers=NDJSON).status_code == 413
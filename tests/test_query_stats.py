@@ -0,0 +1,40 @@
+import re
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from src.middlewares import query_stats
+from src.middlewares.query_stats import QueryStatsMiddleware
+
+
+@pytest.fixture
+def client(db_engine):
+    app = FastAPI()
+    app.add_middleware(QueryStatsMiddleware, query_budget=2)
+
+    @app.get("/queries/{count}")
+    def run_queries(count: int):
+        # A sync route: its statements run in the threadpool and still count.
+        with db_engine.connect() as conn:
+            for _ in range(count):
+                conn.execute(text("SELECT COUNT(*) FROM users"))
+        return {}
+
+    return TestClient(app)
+
+
+def server_timing(response) -> tuple:
+    match = re.fullmatch(r'db;dur=([\d.]+);desc="(\d+) queries"', response.headers["server-timing"])
+    return float(match.group(1)), int(match.group(2))
+
+
+def test_server_timing_counts_the_request_statements(client, monkeypatch):
+    warnings = []
+    monkeypatch.setattr(query_stats.logger, "warning", lambda *args: warnings.append(args))
+    duration, count = server_timing(client.get("/queries/2"))
+    assert count == 2 and duration >= 0
+    assert server_timing(client.get("/queries/0")) == (0.0, 0)
+    assert warnings == []
+
+    assert server_timing(client.get("/queries/3"))[1] == 3
+    assert [args[2:] for args in warnings] == [("/queries/{count}", 3, 2)]
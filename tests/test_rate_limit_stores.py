@@ -0,0 +1,163 @@
+import asyncio
+import subprocess
+import sys
+import time
+import fakeredis
+import pytest
+from src.middlewares.rate_limit_store import InMemoryStore, RedisStore, SharedMemoryStore, sliding_window_hit
+
+
+def hits(store, key, count, limit, period, now):
+    async def run():
+        return [await store.hit(key, limit, period, now) for _ in range(count)]
+    return asyncio.run(run())
+
+
+def test_previous_window_is_weighted_by_its_overlap():
+    state = (0.0, 0, 0)
+    for _ in range(10):
+        allowed, *state = sliding_window_hit(*state, now=5.0, period=10.0, limit=10)
+    assert not sliding_window_hit(*state, now=9.0, period=10.0, limit=10)[0]
+    # Halfway into the next window half of the previous window's 10 hits still count.
+    allowed = []
+    for _ in range(6):
+        ok, *state = sliding_window_hit(*state, now=15.0, period=10.0, limit=10)
+        allowed.append(ok)
+    assert allowed == [True] * 5 + [False]
+
+
+@pytest.fixture(params=["memory", "shared"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        yield InMemoryStore()
+        return
+    store = SharedMemoryStore(str(tmp_path / "rate-limit"), slots=64)
+    yield store
+    asyncio.run(store.close())
+
+
+def test_limit_and_window_expiry(store):
+    assert hits(store, "client", 4, limit=3, period=60, now=1000.0) == [True, True, True, False]
+    assert hits(store, "other", 1, limit=3, period=60, now=1000.0) == [True]
+    # Two windows later nothing of the earlier hits is left.
+    assert hits(store, "client", 3, limit=3, period=60, now=1120.0) == [True, True, True]
+
+
+def test_shared_store_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "rate-limit")
+    first, second = SharedMemoryStore(path, slots=64), SharedMemoryStore(path, slots=64)
+    try:
+        assert hits(first, "client", 2, limit=3, period=60, now=1000.0) == [True, True]
+        assert hits(second, "client", 2, limit=3, period=60, now=1000.0) == [True, False]
+    finally:
+        asyncio.run(first.close())
+        asyncio.run(second.close())
+
+
+def test_shared_store_reuses_the_stalest_slot_when_full(tmp_path):
+    store = SharedMemoryStore(str(tmp_path / "rate-limit"), slots=2, max_probe=2)
+    try:
+        hits(store, "a", 1, limit=1, period=60, now=0.0)
+        hits(store, "b", 1, limit=1, period=60, now=600.0)
+        assert hits(store, "c", 2, limit=1, period=60, now=600.0) == [True, False]
+        assert hits(store, "b", 1, limit=1, period=60, now=600.0) == [False]
+    finally:
+        asyncio.run(store.close())
+
+
+def test_memory_store_evicts_idle_and_excess_keys():
+    store = InMemoryStore(max_keys=2)
+    for key in ("a", "b", "c"):
+        store.allow(key, 1, 60, 1000.0)
+    assert list(store.counters) == ["b", "c"]
+    store.allow("d", 1, 60, 1200.0)
+    assert list(store.counters) == ["d"]
+    assert store.evictions == 3
+
+
+@pytest.fixture
+def redis_store():
+    # The store's Lua script runs in fakeredis through lupa.
+    return RedisStore(client=fakeredis.aioredis.FakeRedis())
+
+
+def test_redis_store_limit_and_expiry(redis_store):
+    async def run():
+        # fakeredis serves TIME from the local clock; start the burst just after a
+        # window boundary so it cannot straddle two windows.
+        await asyncio.sleep(0.2 - time.time() % 0.2 + 0.01)
+        # Concurrent hits go out in one pipeline; the script counts them in order.
+        burst = await asyncio.gather(*(redis_store.hit("client", 3, 0.2, 0) for _ in range(4)))
+        # The script uses the Redis clock, so expiry needs two real periods.
+        await asyncio.sleep(0.45)
+        after = await redis_store.hit("client", 3, 0.2, 0)
+        await redis_store.close()
+        return burst, after
+
+    burst, after = asyncio.run(run())
+    assert sorted(burst) == [False, True, True, True]
+    assert after is True
+
+
+class BrokenPipeline:
+    async def __aenter__(self):
+        raise ConnectionError("redis is down")
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class BrokenClient:
+    def register_script(self, script):
+        return None
+
+    def pipeline(self, transaction=True):
+        return BrokenPipeline()
+
+
+@pytest.mark.parametrize("fail_open", [True, False])
+def test_redis_store_fails_open_or_closed(fail_open):
+    store = RedisStore(client=BrokenClient(), fail_open=fail_open)
+    assert hits(store, "client", 1, limit=3, period=60, now=time.time()) == [fail_open]
+
+
+HOLD_LOCK = """
+import fcntl, os, sys, time
+fd = os.open(sys.argv[1], os.O_RDWR)
+fcntl.lockf(fd, fcntl.LOCK_EX)
+print("locked", flush=True)
+time.sleep(0.3)
+"""
+
+
+def test_shared_store_does_not_block_the_event_loop_on_a_held_lock(tmp_path):
+    path = str(tmp_path / "rate-limit")
+    store = SharedMemoryStore(path, slots=64)
+    # Another worker holds every bucket for a while.
+    holder = subprocess.Popen(
+        [sys.executable, "-c", HOLD_LOCK, path], stdout=subprocess.PIPE, text=True
+    )
+    assert holder.stdout.readline() == "locked\n"
+
+    async def run():
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.ensure_future(tick())
+        allowed = await store.hit("client", 3, 60, 1000.0)
+        ticker.cancel()
+        return allowed, ticks
+
+    try:
+        allowed, ticks = asyncio.run(run())
+    finally:
+        holder.wait()
+        asyncio.run(store.close())
+    assert allowed is True
+    assert ticks >= 10
+
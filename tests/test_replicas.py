@@ -0,0 +1,146 @@
+import asyncio
+import pytest
+from sqlalchemy import Column, Integer, String, create_engine, delete, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base, sessionmaker
+from src.database.replicas import ReplicaSet, RoutingSession, build_replica_set, is_write, reads_from_replica
+
+COUNT = text("SELECT COUNT(*) FROM items")
+
+Base = declarative_base()
+
+
+class Item(Base):
+    __tablename__ = "items"
+    id = Column(Integer, primary_key=True)
+    name = Column(String)
+
+
+@reads_from_replica
+def count_items(session) -> int:
+    return session.execute(COUNT).scalar_one()
+
+
+def database(path, rows: int):
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)"))
+        for i in range(rows):
+            conn.execute(text("INSERT INTO items (name) VALUES (:name)"), {"name": f"item{i}"})
+    return engine
+
+
+@pytest.fixture
+def primary(tmp_path):
+    return database(tmp_path / "primary.db", rows=2)
+
+
+@pytest.fixture
+def replica(tmp_path):
+    # Lagging behind the primary by one row, so each count shows where it ran.
+    return database(tmp_path / "replica.db", rows=1)
+
+
+@pytest.fixture
+def session(primary, replica):
+    sessions = sessionmaker(bind=primary, class_=RoutingSession, replicas=ReplicaSet(primary, [replica]))
+    with sessions() as session:
+        yield session
+
+
+def test_reads_go_to_the_replica(session):
+    assert count_items(session) == 1
+    # Statements outside a replica read stay on the primary.
+    assert session.execute(COUNT).scalar_one() == 2
+
+
+def test_writes_go_to_the_primary(session, primary, replica):
+    session.execute(text("INSERT INTO items (name) VALUES ('new')"))
+    session.commit()
+    with primary.connect() as conn:
+        assert conn.execute(COUNT).scalar_one() == 3
+    with replica.connect() as conn:
+        assert conn.execute(COUNT).scalar_one() == 1
+
+
+def test_reads_stick_to_the_primary_after_a_commit(session):
+    assert count_items(session) == 1
+    session.commit()
+    assert count_items(session) == 2
+
+
+def test_reads_see_an_uncommitted_write_in_the_same_transaction(session):
+    assert count_items(session) == 1
+    session.execute(text("INSERT INTO items (name) VALUES ('new')"))
+    # The write is only on the primary connection until it commits.
+    assert count_items(session) == 3
+
+
+@reads_from_replica
+def add_and_count(session) -> int:
+    session.execute(text("INSERT INTO items (name) VALUES ('new')"))
+    return session.execute(COUNT).scalar_one()
+
+
+def test_a_write_inside_replica_reads_runs_on_the_primary(session, replica):
+    assert add_and_count(session) == 3
+    with replica.connect() as conn:
+        assert conn.execute(COUNT).scalar_one() == 1
+
+
+def test_a_flush_pins_the_session(session):
+    session.flush()
+    assert count_items(session) == 1
+    session.add(Item(name="orm"))
+    session.flush()
+    assert count_items(session) == 3
+
+
+def test_write_detection():
+    assert not is_write(text("  select 1"))
+    assert not is_write(text("WITH x AS (SELECT 1) SELECT * FROM x"))
+    assert is_write(text("UPDATE items SET name = 'x'"))
+    assert is_write(text("INSERT INTO items (name) VALUES ('x')"))
+    assert not is_write(select(Item))
+    assert is_write(delete(Item))
+
+
+def test_a_failing_replica_falls_back_to_the_primary(tmp_path, primary):
+    replicas = build_replica_set(primary, f"sqlite:///{tmp_path}/missing/replica.db", cooldown=60)
+    sessions = sessionmaker(bind=primary, class_=RoutingSession, replicas=replicas)
+    with sessions() as session:
+        assert count_items(session) == 2
+    assert replicas.choose() is None
+
+
+def test_without_replicas_reads_use_the_primary(primary):
+    sessions = sessionmaker(bind=primary, class_=RoutingSession, replicas=ReplicaSet(primary, []))
+    with sessions() as session:
+        assert count_items(session) == 2
+
+
+@reads_from_replica
+async def count_items_async(session) -> int:
+    return (await session.execute(COUNT)).scalar_one()
+
+
+def test_async_sessions_route_reads_the_same_way(tmp_path):
+    database(tmp_path / "primary.db", rows=2)
+    database(tmp_path / "replica.db", rows=1)
+
+    async def run():
+        primary = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/primary.db")
+        replica = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/replica.db")
+        sessions = async_sessionmaker(
+            bind=primary, class_=AsyncSession, sync_session_class=RoutingSession,
+            replicas=ReplicaSet(primary.sync_engine, [replica.sync_engine]),
+        )
+        async with sessions() as session:
+            counts = [await count_items_async(session)]
+            await session.execute(text("INSERT INTO items (name) VALUES ('new')"))
+            counts.append(await count_items_async(session))
+        await primary.dispose()
+        await replica.dispose()
+        return counts
+
+    assert asyncio.run(run()) == [1, 3]
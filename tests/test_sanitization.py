@@ -0,0 +1,115 @@
+import json
+import re
+import pytest
+from fastapi import APIRouter, FastAPI, Request
+from fastapi.testclient import TestClient
+from src.middlewares.sanitization import (
+    DEFAULT_PATTERNS, BlockMaliciousPayloadMiddleware, PayloadScanner, _required_literals
+)
+from src.utils.parsed_body import PARSED_JSON_SCOPE_KEY, ParsedBodyRoute
+
+
+@pytest.mark.parametrize("pattern, literals", [
+    (r"<script", ["<script"]),
+    (r"\bDROP\s+TABLE\b", ["table", "drop"]),
+    (r"eval\s*\(", ["eval", "("]),
+    (r"\x3cscript", []),
+    (r"<iframe", ["<iframe"]),
+    (r"a\nb", []),
+    (r"(a)\1", []),
+    (r"[^]z]evil", ["evil"]),
+])
+def test_required_literals(pattern, literals):
+    assert _required_literals(pattern) == literals
+
+
+def test_escaped_pattern_still_matches():
+    scanner = PayloadScanner([r"\x3cscript"])
+    assert scanner.contains_malicious({"bio": "<script>alert(1)</script>"})
+
+
+@pytest.mark.parametrize("body", [
+    '{"bio": "<ſcript>"}'.encode("utf-8"),
+    b'{"bio": "\\u003cscript>"}',
+])
+def test_raw_verdict_defers_when_bytes_can_hide_a_match(body):
+    scanner = PayloadScanner(DEFAULT_PATTERNS)
+    assert scanner.raw_verdict(body) is None
+
+
+def test_raw_verdict_settles_plain_ascii():
+    scanner = PayloadScanner(DEFAULT_PATTERNS)
+    assert scanner.raw_verdict(b'{"bio": "<SCRIPT>"}') is True
+    assert scanner.raw_verdict(b'{"bio": "hello"}') is False
+
+
+# Patterns an operator might put in SANITIZER_PATTERNS_FILE, chosen to exercise
+# the literal extraction: classes, negated classes with a leading "]", escapes,
+# quantifiers and inline flags.
+SAMPLE_PATTERNS = [
+    r"[^]z]evil",
+    r"[]a]bc",
+    r"<svg[^>]*onload",
+    r"data\s*:\s*text/html",
+    r"vb?script:",
+    r"a{2,3}b",
+    r"x+y",
+    r"(?i)select.+from",
+    r"\.\./",
+    r"%3cscript",
+    r"expression\s*\(",
+    r"\x3cimg",
+    r"[\]]x",
+    r"path\\to",
+]
+
+SAMPLE_INPUTS = [
+    "", "hello world", "aevil", "zevil", "]evil", "]bc", "abc", "bc",
+    "<script>alert(1)</script>", "<SCRIPT src=x>", "<ſcript>", "<iframe src=x>",
+    '<a href="javascript:alert(1)">', "<img src='javascript:x'>", "<body onload=x>",
+    "1 OR 1=1", "drop table users", "UNION   SELECT *", "eval (x)",
+    "<svg/onload=alert(1)>", "<svg onload=x>", "data: text/html,x", "vscript:", "vbscript:",
+    "aab", "ab", "aaab", "xxy", "y", "SELECT a FROM b", "../../etc/passwd", "%3CSCRIPT",
+    "expression(x)", "<img src=x>", "]x", "path\\to", "pathto",
+]
+
+
+@pytest.mark.parametrize("pattern", DEFAULT_PATTERNS + SAMPLE_PATTERNS)
+def test_prefilter_agrees_with_the_full_scan(pattern):
+    scanner = PayloadScanner([pattern])
+    regex = re.compile(pattern, re.IGNORECASE)
+    for value in SAMPLE_INPUTS:
+        assert scanner.search(value) == bool(regex.search(value)), value
+        if scanner.raw_verdict(json.dumps({"v": value}).encode()) is False:
+            assert not regex.search(value), value
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.add_middleware(BlockMaliciousPayloadMiddleware, max_body_size=64)
+    router = APIRouter(route_class=ParsedBodyRoute)
+
+    @router.post("/echo")
+    async def echo(request: Request, data: dict):
+        return {"data": data, "parsed_by_middleware": PARSED_JSON_SCOPE_KEY in request.scope}
+
+    app.include_router(router)
+    return TestClient(app)
+
+
+def test_body_over_max_body_bytes_is_413(client):
+    body = json.dumps({"name": "x" * 100})
+    assert client.post("/echo", content=body, headers={"Content-Type": "application/json"}).status_code == 413
+
+
+def test_chunked_body_over_max_body_bytes_is_413(client):
+    # No Content-Length to check up front, so the limit applies while reading.
+    chunks = iter([b'{"name": "', b"x" * 100, b'"}'])
+    assert client.post("/echo", content=chunks, headers={"Content-Type": "application/json"}).status_code == 413
+
+
+def test_route_reuses_the_middleware_parse(client):
+    response = client.post("/echo", json={"name": "ok"})
+    assert response.json() == {"data": {"name": "ok"}, "parsed_by_middleware": True}
+    assert client.post("/echo", json={"name": "<script>x</script>"}).status_code == 400
@@ -0,0 +1,41 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from src.users import service
+from src.users.router import router
+
+
+@pytest.fixture
+def client(db_engine):
+    with db_engine.begin() as conn:
+        conn.execute(text("INSERT INTO users (username, email) VALUES ('taken', 'taken@example.com')"))
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+
+def user(name: str, email: str = None) -> dict:
+    return {"username": name, "email": email or f"{name}@example.com", "is_active": True}
+
+
+def test_bulk_create_reports_each_row(client):
+    rows = [user("a"), user("b", "taken@example.com"), user("c"), user("a2", "a@example.com")]
+    response = client.post("/users/bulk", json=rows)
+    assert response.status_code == 207
+    data = response.json()["data"]
+    assert (data["created"], data["failed"]) == (2, 2)
+    assert [(r["index"], r["status"]) for r in data["results"]] == [(0, 201), (1, 409), (2, 201), (3, 409)]
+    assert data["results"][0]["data"]["email"] == "a@example.com"
+    assert data["results"][1]["data"] is None
+
+
+def test_bulk_create_without_failures_is_201(client):
+    response = client.post("/users/bulk", json=[user("d"), user("e")])
+    assert response.status_code == 201
+    assert response.json()["data"]["created"] == 2
+
+
+def test_bulk_create_row_limit(client, monkeypatch):
+    monkeypatch.setattr(service, "BULK_CREATE_MAX_ROWS", 1)
+    assert client.post("/users/bulk", json=[user("f"), user("g")]).status_code == 413
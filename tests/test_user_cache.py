@@ -0,0 +1,47 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from src.users.cache import user_cache
+from src.users.router import router
+from src.utils.cache import LRUCache
+
+
+@pytest.fixture
+def client(db_engine):
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+
+def test_update_and_delete_refresh_the_cache(client):
+    user_id = client.post("/users/", json={"username": "frank", "email": "frank@example.com"}).json()["data"]["id"]
+    assert user_cache.get(user_id).username == "frank"
+
+    body = {"username": "francis", "email": "frank@example.com", "is_active": True}
+    assert client.put(f"/users/{user_id}", json=body).status_code == 200
+    assert (user_cache.get(user_id).username, user_cache.get(user_id).version) == ("francis", 2)
+    assert client.get(f"/users/{user_id}").json()["data"]["username"] == "francis"
+
+    assert client.delete(f"/users/{user_id}").status_code == 200
+    assert user_cache.get(user_id) is None
+    assert client.get(f"/users/{user_id}").status_code == 404
+
+
+def test_a_failed_precondition_drops_the_entry(client):
+    user_id = client.post("/users/", json={"username": "gina", "email": "gina@example.com"}).json()["data"]["id"]
+    body = {"username": "gina2", "email": "gina@example.com", "is_active": True}
+    assert client.put(f"/users/{user_id}", json=body, headers={"If-Match": f'"{user_id}.9"'}).status_code == 412
+    assert user_cache.get(user_id) is None
+
+
+def test_lru_cache_bounds_and_expiry():
+    cache = LRUCache(max_entries=2, ttl=60, sizeof=lambda value: 1)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+    assert cache.evictions == 1
+    cache.set("d", 4, ttl=0)
+    assert cache.get("d") is None
+    assert cache.expirations == 1
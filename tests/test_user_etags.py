@@ -0,0 +1,48 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from src.users.cache import user_cache
+from src.users.router import router
+
+
+@pytest.fixture
+def user_id(db_engine):
+    with db_engine.begin() as conn:
+        return conn.execute(
+            text("INSERT INTO users (username, email) VALUES ('alice', 'alice@example.com') RETURNING id")
+        ).scalar_one()
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+
+def test_conditional_get_ignores_a_stale_cache_entry(client, db_engine, user_id):
+    first = client.get(f"/users/{user_id}")
+    assert first.headers["etag"] == f'"{user_id}.1"'
+    assert user_cache.get(user_id).version == 1
+
+    # A write through another worker leaves this process's cache entry stale.
+    with db_engine.begin() as conn:
+        conn.execute(text("UPDATE users SET username = 'bob', version = 2 WHERE id = :id"), {"id": user_id})
+
+    changed = client.get(f"/users/{user_id}", headers={"If-None-Match": f'"{user_id}.1"'})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] == f'"{user_id}.2"'
+    assert changed.json()["data"]["username"] == "bob"
+
+    unchanged = client.get(f"/users/{user_id}", headers={"If-None-Match": f'W/"{user_id}.2"'})
+    assert unchanged.status_code == 304
+
+
+def test_if_match_with_an_old_version_fails(client, user_id):
+    body = {"username": "carol", "email": "carol@example.com", "is_active": True}
+    assert client.put(f"/users/{user_id}", json=body, headers={"If-Match": f'"{user_id}.7"'}).status_code == 412
+    assert client.put(f"/users/{user_id}", json=body, headers={"If-Match": f'W/"{user_id}.1"'}).status_code == 412
+    updated = client.put(f"/users/{user_id}", json=body, headers={"If-Match": f'"{user_id}.1"'})
+    assert updated.status_code == 200
+    assert updated.headers["etag"] == f'"{user_id}.2"'
@@ -0,0 +1,41 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from src.users import service
+from src.users.router import router
+
+
+@pytest.fixture
+def client(db_engine):
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+
+@pytest.fixture
+def ids(db_engine):
+    with db_engine.begin() as conn:
+        return [
+            conn.execute(
+                text("INSERT INTO users (username, email) VALUES (:name, :email) RETURNING id"),
+                {"name": name, "email": f"{name}@example.com"},
+            ).scalar_one()
+            for name in ("h", "i", "j")
+        ]
+
+
+def test_lookup_keeps_the_requested_order(client, ids):
+    # The middle one is served from the user cache, the others from the database.
+    client.get(f"/users/{ids[1]}")
+    requested = [ids[2], 999999, ids[0], ids[1], ids[2]]
+    response = client.post("/users/lookup", json={"ids": requested})
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert [u["id"] for u in data["users"]] == [ids[2], ids[0], ids[1]]
+    assert data["missing"] == [999999]
+
+
+def test_lookup_id_limit(client, monkeypatch):
+    monkeypatch.setattr(service, "USERS_LOOKUP_MAX_IDS", 2)
+    assert client.post("/users/lookup", json={"ids": [1, 2, 3]}).status_code == 413